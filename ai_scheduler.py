@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 细节层次 (LOD) 调度器
+按到玩家的距离把敌人分层，远处的敌人降低更新频率，跳过的时间累积到下一次更新
+"""
+
+from config import GameConfig
+from numpy_support import np  # 没有安装 NumPy 时只使用逐个敌人计算的 schedule()
+
+
+class AILODScheduler:
+    """敌人AI的分层调度
+    每层是 (最大距离, 更新间隔帧数)，最后一层的最大距离为None表示不限；
+    屏幕内的敌人总是放在第0层，每帧更新
+    """
+
+    def __init__(self, tiers=None):
+        """初始化调度器"""
+        if tiers is None:
+            tiers = GameConfig.AI_LOD_TIERS
+        self.tiers = tiers
+        self.frame = 0
+        self.pending_dt = []
+
+        # 分层统计，供性能分析使用
+        self.tier_counts = [0] * len(tiers)
+        self.updated_count = 0
+
+    def reset(self, enemy_count):
+        """关卡重置时清空累积的时间"""
+        self.frame = 0
+        self.pending_dt = [0.0] * enemy_count
+        self.tier_counts = [0] * len(self.tiers)
+        self.updated_count = 0
+
+    def get_tier(self, enemy, player, visible_bounds):
+        """计算敌人所在的层"""
+        start_x, start_y, end_x, end_y = visible_bounds
+        if start_x <= enemy.x < end_x and start_y <= enemy.y < end_y:
+            return 0
+
+        dx = enemy.x - player.x
+        dy = enemy.y - player.y
+        distance_sq = dx * dx + dy * dy
+        for tier, (max_distance, _) in enumerate(self.tiers):
+            if max_distance is None or distance_sq <= max_distance * max_distance:
+                return tier
+        return len(self.tiers) - 1
+
+    def schedule(self, dt, enemies, player, visible_bounds):
+        """返回每个敌人本帧应使用的时间增量，0 表示本帧跳过"""
+        if len(self.pending_dt) != len(enemies):
+            self.reset(len(enemies))
+
+        self.frame += 1
+        tier_counts = [0] * len(self.tiers)
+        updated = 0
+        enemy_dts = []
+
+        for index, enemy in enumerate(enemies):
+            tier = self.get_tier(enemy, player, visible_bounds)
+            tier_counts[tier] += 1
+            interval = self.tiers[tier][1]
+
+            pending = self.pending_dt[index] + dt
+            # 按编号错开同一层敌人的更新帧，避免集中在同一帧
+            if interval <= 1 or (self.frame + index) % interval == 0:
+                enemy_dts.append(pending)
+                self.pending_dt[index] = 0.0
+                updated += 1
+            else:
+                enemy_dts.append(0.0)
+                self.pending_dt[index] = pending
+
+        self.tier_counts = tier_counts
+        self.updated_count = updated
+        return enemy_dts
+
+    def schedule_arrays(self, dt, x, y, player, visible_bounds):
+        """schedule() 的批量版本，x、y 为敌人坐标数组，返回时间增量数组，供敌人系统使用"""
+        count = len(x)
+        if not isinstance(self.pending_dt, np.ndarray) or len(self.pending_dt) != count:
+            pending = self.pending_dt if len(self.pending_dt) == count else [0.0] * count
+            self.pending_dt = np.array(pending, dtype=np.float64)
+
+        self.frame += 1
+        start_x, start_y, end_x, end_y = visible_bounds
+        dx = x - player.x
+        dy = y - player.y
+        distance_sq = dx * dx + dy * dy
+
+        # 从外层往内层覆盖，每个敌人最终落在满足距离条件的最内层
+        tiers = np.full(count, len(self.tiers) - 1, dtype=np.int64)
+        for tier in range(len(self.tiers) - 1, -1, -1):
+            max_distance = self.tiers[tier][0]
+            if max_distance is None:
+                tiers[:] = tier
+            else:
+                tiers[distance_sq <= max_distance * max_distance] = tier
+        tiers[(x >= start_x) & (x < end_x) & (y >= start_y) & (y < end_y)] = 0
+
+        intervals = np.array([interval for _, interval in self.tiers], dtype=np.int64)[tiers]
+        pending = self.pending_dt + dt
+        # 按编号错开同一层敌人的更新帧，避免集中在同一帧
+        due = (intervals <= 1) | ((self.frame + np.arange(count)) % np.maximum(intervals, 1) == 0)
+        enemy_dts = np.where(due, pending, 0.0)
+        self.pending_dt = np.where(due, 0.0, pending)
+
+        self.tier_counts = np.bincount(tiers, minlength=len(self.tiers)).tolist()
+        self.updated_count = int(np.count_nonzero(due))
+        return enemy_dts
\ No newline at end of file
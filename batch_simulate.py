@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量模拟
+把大量 (关卡, 种子, 输入脚本) 组合分发到进程池中无界面运行，用于调整 GameConfig 中的数值。
+每个工作进程只读取一次关卡文件，结果在完成时逐条返回，最后按关卡汇总写入 CSV 或 JSON
+
+用法: python batch_simulate.py [--levels 1 2] [--seeds N] [--hold-ticks 15 30] [--ticks N]
+                               [--workers N] [--set ENEMY_CHASE_DISTANCE=6] [--csv summary.csv] [--json results.json]
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import GameConfig
+from headless import HeadlessSimulation, RandomInput
+
+
+# 工作进程中的模拟器
+_worker_simulation = None
+
+
+def _init_worker(levels, overrides):
+    """工作进程初始化：应用配置覆盖并预先加载关卡"""
+    global _worker_simulation
+    for name, value in overrides.items():
+        setattr(GameConfig, name, value)
+    # 批量模拟已经占满所有核心，不再为大地图另开寻路进程
+    GameConfig.PATH_WORKER_COUNT = 0
+
+    _worker_simulation = HeadlessSimulation()
+    for level_num in levels:
+        _worker_simulation.load_level(level_num)
+
+
+def _worker_run(level_num, seed, hold_ticks, max_ticks):
+    """在工作进程中运行一次模拟"""
+    stats = _worker_simulation.run_level(level_num, max_ticks, RandomInput(seed, hold_ticks))
+    if stats is not None:
+        stats.update(seed=seed, hold_ticks=hold_ticks)
+    return stats
+
+
+def parse_override(text):
+    """解析 NAME=VALUE 形式的配置覆盖，VALUE 按 JSON 解析，失败时作为字符串"""
+    name, separator, value = text.partition("=")
+    name = name.strip()
+    if not separator or not hasattr(GameConfig, name):
+        raise argparse.ArgumentTypeError(f"无效的配置项: {text}")
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def summarize(results):
+    """按关卡汇总模拟结果"""
+    summary = {}
+    for stats in results:
+        level = summary.setdefault(stats["level"], {
+            "level": stats["level"], "name": stats["name"], "runs": 0,
+            "VICTORY": 0, "GAME_OVER": 0, "TIMEOUT": 0,
+            "game_time": 0.0, "score": 0, "deaths": 0, "ticks": 0, "elapsed": 0.0
+        })
+        level["runs"] += 1
+        level[stats["result"]] += 1
+        for key in ("game_time", "score", "deaths", "ticks", "elapsed"):
+            level[key] += stats[key]
+
+    rows = []
+    for level_num in sorted(summary):
+        level = summary[level_num]
+        runs = level["runs"]
+        rows.append({
+            "level": level_num,
+            "name": level["name"],
+            "runs": runs,
+            "victories": level["VICTORY"],
+            "game_overs": level["GAME_OVER"],
+            "timeouts": level["TIMEOUT"],
+            "win_rate": round(level["VICTORY"] / runs, 4),
+            "avg_game_time": round(level["game_time"] / runs, 3),
+            "avg_score": round(level["score"] / runs, 2),
+            "avg_deaths": round(level["deaths"] / runs, 3),
+            "ticks_per_sec": round(level["ticks"] / level["elapsed"]) if level["elapsed"] > 0 else 0,
+        })
+    return rows
+
+
+def write_csv(path, rows):
+    """把结果写入 CSV 文件"""
+    if not rows:
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在进程池中批量运行无界面模拟")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2], help="要模拟的关卡编号")
+    parser.add_argument("--seeds", type=int, default=100, help="每个关卡、每种输入脚本运行的种子数")
+    parser.add_argument("--hold-ticks", type=int, nargs="+", default=[30], help="随机输入每个方向保持的模拟步数，可给多个")
+    parser.add_argument("--ticks", type=int, default=GameConfig.SIMULATION_RATE * 300, help="每次模拟最多运行的步数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="工作进程数，默认为CPU核心数")
+    parser.add_argument("--set", dest="overrides", type=parse_override, action="append", default=[],
+                        metavar="NAME=VALUE", help="覆盖 GameConfig 中的配置，可重复使用")
+    parser.add_argument("--csv", help="汇总结果写入的 CSV 文件")
+    parser.add_argument("--json", help="汇总结果和每次模拟的明细写入的 JSON 文件")
+    parser.add_argument("--quiet", action="store_true", help="不逐条输出每次模拟的结果")
+    args = parser.parse_args()
+
+    overrides = dict(args.overrides)
+    tasks = [(level_num, seed, hold_ticks, args.ticks)
+             for level_num in args.levels
+             for hold_ticks in args.hold_ticks
+             for seed in range(args.seeds)]
+
+    results = []
+    begin = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.levels, overrides)) as executor:
+        futures = [executor.submit(_worker_run, *task) for task in tasks]
+        for future in as_completed(futures):
+            stats = future.result()
+            if stats is None:
+                continue
+            results.append(stats)
+            if not args.quiet:
+                print(f"[{len(results)}/{len(tasks)}] 关卡{stats['level']} 种子{stats['seed']} "
+                      f"{stats['result']:<9} 时间{stats['game_time']:>8.2f}s 分数{stats['score']:>6} 死亡{stats['deaths']}")
+    elapsed = time.perf_counter() - begin
+
+    summary = summarize(results)
+    print(f"{'关卡':<20}{'次数':>6}{'胜率':>8}{'平均时间':>10}{'平均分数':>10}{'平均死亡':>10}")
+    for row in summary:
+        print(f"{row['name']:<20}{row['runs']:>6}{row['win_rate']:>8.1%}{row['avg_game_time']:>10.2f}"
+              f"{row['avg_score']:>10.1f}{row['avg_deaths']:>10.2f}")
+    total_ticks = sum(stats["ticks"] for stats in results)
+    print(f"共 {len(results)} 次模拟，{total_ticks} 步，耗时 {elapsed:.2f} 秒，"
+          f"合计 {total_ticks / elapsed if elapsed > 0 else 0:.0f} 步/秒")
+
+    if args.csv:
+        write_csv(args.csv, summary)
+    if args.json:
+        results.sort(key=lambda stats: (stats["level"], stats["hold_ticks"], stats["seed"]))
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"overrides": overrides, "ticks": args.ticks, "summary": summary, "runs": results},
+                      f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
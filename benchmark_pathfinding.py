@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+寻路算法对比测试
+在 levels/ 目录下的关卡上比较 A* 与跳点搜索 (JPS) 的耗时和展开节点数
+
+用法: python benchmark_pathfinding.py [--queries N] [--open-size N]
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from config import GameConfig
+from level_manager import LevelGrid
+from pathfinding import AStarPathfinder, JumpPointSearch
+
+
+def make_open_level(size, seed):
+    """生成一个大部分是空地、散布矩形墙块的关卡，用于对比开阔地图上的表现"""
+    rng = random.Random(seed)
+    walls = [[0, 0, size, 1], [0, size - 1, size, 1], [0, 0, 1, size], [size - 1, 0, 1, size]]
+    for _ in range(size * size // 60):
+        walls.append([rng.randint(2, size - 8), rng.randint(2, size - 8), rng.randint(1, 4), rng.randint(1, 4)])
+    return {
+        "name": f"开阔地图 {size}x{size}",
+        "width": size,
+        "height": size,
+        "goal": [size - 2, size - 2],
+        "walls": walls,
+        "swamps": [],
+        "traps": []
+    }
+
+
+def benchmark_level(level_data, queries, seed):
+    """在一个关卡上对每种算法跑相同的随机起终点，返回统计结果"""
+    grid = LevelGrid(level_data)
+    free_cells = [(x, y) for y in range(grid.height) for x in range(grid.width)
+                  if not grid.is_blocked(x, y)]
+    rng = random.Random(seed)
+    pairs = [(rng.choice(free_cells), rng.choice(free_cells)) for _ in range(queries)]
+
+    results = {}
+    lengths = {}
+    for name, pathfinder in (("A*", AStarPathfinder()), ("JPS", JumpPointSearch())):
+        expanded = 0
+        lengths[name] = []
+        begin = time.perf_counter()
+        for start, goal in pairs:
+            path = pathfinder.find_path(grid, start, goal)
+            expanded += pathfinder.expanded
+            lengths[name].append(len(path))
+        elapsed = time.perf_counter() - begin
+        results[name] = (elapsed * 1000 / queries, expanded / queries)
+
+    # 两种算法都应该找到最短路径
+    if lengths["A*"] != lengths["JPS"]:
+        print("  警告: 两种算法的路径长度不一致")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较 A* 与 JPS 寻路")
+    parser.add_argument("--queries", type=int, default=500, help="每个关卡的寻路次数")
+    parser.add_argument("--open-size", type=int, default=0, help="额外测试的开阔地图边长，0表示不测试")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    levels = []
+    for level_file in sorted(Path(GameConfig.LEVELS_DIR).glob("level*.json")):
+        with open(level_file, "r", encoding="utf-8") as f:
+            levels.append(json.load(f))
+    if args.open_size:
+        levels.append(make_open_level(args.open_size, args.seed))
+
+    print(f"{'关卡':<20}{'算法':<6}{'平均耗时(ms)':>14}{'平均展开节点':>14}")
+    for level_data in levels:
+        results = benchmark_level(level_data, args.queries, args.seed)
+        for name, (milliseconds, expanded) in results.items():
+            print(f"{level_data['name']:<20}{name:<6}{milliseconds:>14.3f}{expanded:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
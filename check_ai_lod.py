@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 细节层次 (LOD) 一致性检查
+在开阔地图上放置远离玩家、沿方形路线巡逻的敌人，分别开启和关闭 AI LOD 长时间模拟，
+比较最终的位置和巡逻进度。降频更新的敌人只是更新得不那么频繁，不应该与逐帧更新的敌人越走越远
+
+用法: python check_ai_lod.py [--size N] [--enemies N] [--seconds N] [--seed N]
+"""
+
+import argparse
+import random
+import sys
+from config import GameConfig
+from game_engine import GameEngine
+from headless import KeyState
+from level_manager import LevelManager
+from numpy_support import np
+
+
+def make_patrol_level(size, enemy_count, seed):
+    """生成只有边界墙的开阔地图，玩家在左上角，敌人在远处沿方形路线巡逻"""
+    rng = random.Random(seed)
+    enemies = []
+    for _ in range(enemy_count):
+        side = rng.randint(3, 12)
+        x = rng.randint(size // 4, size - side - 2)
+        y = rng.randint(size // 4, size - side - 2)
+        path = [[x, y], [x + side, y], [x + side, y + side], [x, y + side]]
+        enemies.append({"start": path[0], "path": path, "speed": rng.choice((1, 2, 3))})
+    return {
+        "name": f"巡逻地图 {size}x{size}",
+        "width": size,
+        "height": size,
+        "player_start": [1, 1],
+        "goal": [size - 2, size - 2],
+        "walls": [[0, 0, size, 1], [0, size - 1, size, 1], [0, 0, 1, size], [size - 1, 0, 1, size]],
+        "swamps": [],
+        "traps": [],
+        "enemies": enemies,
+        "power_ups": []
+    }
+
+
+def simulate(level_data, ticks, lod_enabled, batched):
+    """运行 ticks 个模拟步，返回每一步之后各个敌人的 (x, y, 当前巡逻点)，以及每个敌人还没有用掉的累积时间"""
+    saved = GameConfig.AI_LOD_ENABLED, GameConfig.ENEMY_SYSTEM_MIN_COUNT
+    GameConfig.AI_LOD_ENABLED = lod_enabled
+    GameConfig.ENEMY_SYSTEM_MIN_COUNT = 1 if batched else len(level_data["enemies"]) + 1
+    try:
+        level_manager = LevelManager()
+        level_manager.current_level = level_data
+        engine = GameEngine(None, level_manager, None, input_source=KeyState)
+        engine.reset()
+        dt = 1000 / GameConfig.SIMULATION_RATE
+        history = []
+        for _ in range(ticks):
+            engine.update(dt)
+            history.append([(enemy.x, enemy.y, enemy.current_target) for enemy in engine.enemies])
+        engine.shutdown()
+        pending_dt = engine.ai_scheduler.pending_dt if lod_enabled else [0.0] * len(engine.enemies)
+        return history, pending_dt
+    finally:
+        GameConfig.AI_LOD_ENABLED, GameConfig.ENEMY_SYSTEM_MIN_COUNT = saved
+
+
+def compare(level_data, ticks, batched):
+    """比较开启和关闭 LOD 的结果，返回 (最大位置偏差, 巡逻进度不同的敌人数)
+    开启 LOD 时敌人最后一次更新之后累积的时间还没有用掉，与逐帧更新在同一时刻的状态比较
+    """
+    reference, _ = simulate(level_data, ticks, False, batched)
+    history, pending_dt = simulate(level_data, ticks, True, batched)
+    dt = 1000 / GameConfig.SIMULATION_RATE
+    max_offset = 0.0
+    target_mismatches = 0
+    for index, (x1, y1, target1) in enumerate(history[-1]):
+        x0, y0, target0 = reference[-1 - round(pending_dt[index] / dt)][index]
+        max_offset = max(max_offset, abs(x1 - x0), abs(y1 - y0))
+        if target0 != target1:
+            target_mismatches += 1
+    return max_offset, target_mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查 AI LOD 降频更新是否与逐帧更新一致")
+    parser.add_argument("--size", type=int, default=120, help="地图边长")
+    parser.add_argument("--enemies", type=int, default=40, help="巡逻敌人数")
+    parser.add_argument("--seconds", type=int, default=60, help="模拟的游戏时间（秒）")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="允许的最大位置偏差（格）")
+    args = parser.parse_args()
+
+    level_data = make_patrol_level(args.size, args.enemies, args.seed)
+    ticks = args.seconds * GameConfig.SIMULATION_RATE
+    modes = [("逐个更新", False)]
+    if np is not None:
+        modes.append(("批量更新", True))
+
+    failed = False
+    print(f"{'更新方式':<10}{'最大位置偏差':>14}{'巡逻点不同':>12}")
+    for name, batched in modes:
+        max_offset, target_mismatches = compare(level_data, ticks, batched)
+        print(f"{name:<10}{max_offset:>14.2e}{target_mismatches:>12}")
+        if max_offset > args.tolerance or target_mismatches:
+            failed = True
+
+    print("不一致" if failed else "一致")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
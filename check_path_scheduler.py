@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分帧寻路调度器检查
+在蛇形迷宫里让许多追击者共享每帧的寻路预算，目标每隔一段时间换一个格子并重新提交请求，
+检查需要跨越多帧的长搜索最终都能送回路径，而不是被不断到来的新请求反复打断
+
+用法: python check_path_scheduler.py [--size N] [--chasers N] [--frames N] [--refresh N]
+"""
+
+import argparse
+import sys
+from level_manager import LevelGrid
+from path_scheduler import PathRequestScheduler
+from pathfinding import route_cache
+
+
+class Chaser:
+    """只记录收到路径次数的请求者"""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.received = 0
+        self.last_path = []
+
+    def receive_path(self, path):
+        self.received += 1
+        self.last_path = path
+
+
+def make_serpentine_level(size):
+    """生成蛇形迷宫：每隔一行一道横墙，缺口左右交替，两端之间的路径长度约为格子数的一半"""
+    walls = [[0, 0, size, 1], [0, size - 1, size, 1], [0, 0, 1, size], [size - 1, 0, 1, size]]
+    for row, y in enumerate(range(2, size - 2, 2)):
+        if row % 2 == 0:
+            walls.append([1, y, size - 3, 1])
+        else:
+            walls.append([2, y, size - 3, 1])
+    return {
+        "name": f"蛇形迷宫 {size}x{size}",
+        "width": size,
+        "height": size,
+        "goal": [size - 2, size - 2],
+        "walls": walls,
+        "swamps": [],
+        "traps": []
+    }
+
+
+def run(size, chaser_count, frames, refresh):
+    """模拟 frames 帧，返回每个追击者收到路径的次数"""
+    grid = LevelGrid(make_serpentine_level(size))
+    route_cache.clear()
+    scheduler = PathRequestScheduler()
+
+    # 追击者在迷宫底部，目标在顶部来回移动
+    bottom = size - 2 if (size - 3) % 2 == 0 else size - 3
+    chasers = [Chaser(1 + index * (size - 3) // max(1, chaser_count - 1), bottom) for index in range(chaser_count)]
+    for frame in range(frames):
+        if frame % refresh == 0:
+            goal = (1 + (frame // refresh) % (size - 2), 1)
+            for chaser in chasers:
+                scheduler.submit(chaser, grid, (chaser.x, chaser.y), goal)
+        scheduler.poll()
+    return chasers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查分帧寻路在竞争预算时仍能送回长路径")
+    parser.add_argument("--size", type=int, default=120, help="迷宫边长")
+    parser.add_argument("--chasers", type=int, default=20, help="追击者数量")
+    parser.add_argument("--frames", type=int, default=600, help="模拟的帧数")
+    parser.add_argument("--refresh", type=int, default=30, help="每隔多少帧重新提交一次请求（500ms）")
+    args = parser.parse_args()
+
+    chasers = run(args.size, args.chasers, args.frames, args.refresh)
+    starved = [chaser for chaser in chasers if chaser.received == 0]
+    unreachable = [chaser for chaser in chasers if chaser.received and not chaser.last_path]
+    received = [chaser.received for chaser in chasers]
+    print(f"送回路径次数: 最少 {min(received)}，最多 {max(received)}，"
+          f"没有收到路径的追击者 {len(starved)}，收到空路径的追击者 {len(unreachable)}")
+
+    failed = bool(starved or unreachable)
+    print("失败" if failed else "通过")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -11,6 +11,10 @@ class GameConfig:
     SCREEN_WIDTH = 1024
     SCREEN_HEIGHT = 768
     FPS = 60
+    SIMULATION_RATE = 60  # 固定的模拟步频（次/秒），与渲染帧率无关
+    MAX_SIMULATION_STEPS = 5  # 每帧最多追赶的模拟步数，超出的积压时间直接丢弃
+    RENDER_INTERPOLATION = True  # 在相邻两次模拟步之间插值玩家、敌人和摄像机的绘制位置
+    DEBUG = False  # 输出玩家移动和碰撞的调试信息
 
     # 游戏网格设置
     TILE_SIZE = 32
@@ -62,6 +66,21 @@ class GameConfig:
     # 敌人设置
     ENEMY_SPEED = 2
     ENEMY_CHASE_DISTANCE = 5
+    ENEMY_SYSTEM_MIN_COUNT = 32  # 敌人数达到该值时使用批量更新的敌人系统（需要NumPy）
+    AI_LOD_ENABLED = True  # 远处的敌人降低AI更新频率
+    AI_LOD_TIERS = [(12, 1), (24, 2), (48, 4), (None, 8)]  # (最大距离, 每几帧更新一次)
+    FLOW_FIELD_RADIUS = 32  # 共享距离场的最大步数，超出范围的敌人单独寻路
+    PATHFINDING_BACKEND = "astar"  # 网格寻路算法: "astar" 或 "jps"（跳点搜索，适合开阔地图）
+    ROUTE_CACHE_SIZE = 256  # 路径缓存最多保存的路径数
+    HPA_MIN_CELLS = 128 * 128  # 格子数达到该值的关卡使用分层寻路，优先于 PATHFINDING_BACKEND
+    HPA_CLUSTER_SIZE = 16  # 分层寻路的区块边长
+    HPA_REFINE_SEGMENTS = 4  # 每次寻路最多细化的抽象路段数
+    PATH_WORKER_COUNT = 2  # 后台寻路进程数，0 表示关闭
+    ASYNC_PATHFINDING_MIN_CELLS = 256 * 256  # 格子数达到该值的关卡把寻路请求交给后台进程
+    PATH_BUDGET_MIN_ENEMIES = 8  # 敌人数达到该值的关卡把寻路请求分摊到多帧执行（只用于使用A*的关卡，分层寻路和JPS优先）
+    PATH_BUDGET_EXPANSIONS = 2000  # 每帧寻路最多展开的节点数
+    PATH_BUDGET_MICROSECONDS = 0  # 每帧寻路的时间预算（微秒），0 表示只按节点数限制
+    PATH_SLICE_EXPANSIONS = 250  # 轮转时每个请求一次分到的节点数
 
     # 道具设置
     POWER_UP_DURATION = {
@@ -97,6 +116,27 @@ class GameConfig:
     ANIMATION_SPEED = 8
     BLINK_DURATION = 500  # 闪烁持续时间（毫秒）
 
+    # 渲染设置
+    LEVEL_SURFACE_MAX_PIXELS = 4096 * 4096  # 关卡预渲染表面的最大像素数，超过时改为分块渲染
+    LEVEL_CHUNK_SIZE = 16  # 分块渲染时每块的边长（格）
+    LEVEL_CHUNK_CACHE_SIZE = 64  # 常驻内存的分块数量上限
+    LEVEL_CHUNK_PREFETCH_MARGIN = 1  # 摄像机四周提前渲染的分块圈数
+    LEVEL_CHUNK_PREFETCH_PER_FRAME = 2  # 每帧最多提前渲染的分块数
+    MINIMAP_FOG_OF_WAR = False  # 小地图只显示玩家探索过的区域
+    MINIMAP_REVEAL_RADIUS = 4  # 玩家周围被探索的半径（格）
+    PARTICLE_BURST_SIZE = 10  # 每次受伤或拾取道具产生的粒子数
+    PARTICLE_CAPACITY = 4096  # 粒子池容量，超出时新粒子被丢弃
+    PARTICLE_ALPHA_LEVELS = 32  # 粒子透明度的档位数，每档预先生成一个表面
+    SPATIAL_CHUNK_SIZE = 8  # 渲染空间索引的分块边长（格）
+    TEXT_CACHE_SIZE = 128  # 缓存的文字表面数量上限
+    DIRTY_RECT_RENDERING = False  # 摄像机不动时只把变化的区域送到显示器，适合低性能设备
+
+    # 性能分析设置
+    PROFILER_ENABLED = False  # 启动时就记录每帧各部分的耗时并显示叠加层，游戏中按 F3 开关
+    PROFILER_CAPACITY = 600  # 环形缓冲区保存的帧数
+    PROFILER_OVERLAY_REFRESH = 15  # 叠加层的统计数据每隔多少帧刷新一次
+    PROFILER_EXPORT_FILE = "frame_profile.csv"  # 按 F4 导出记录时写入的文件
+
     # 文件路径
     LEVELS_DIR = "levels"
     ASSETS_DIR = "assets"
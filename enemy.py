@@ -7,8 +7,11 @@
 
 import pygame
 import math
-from collections import deque
 from config import GameConfig
+from level_manager import get_level_grid
+from pathfinding import find_path
+from sprite_cache import sprite_cache
+from text_cache import text_cache
 
 
 class Enemy:
@@ -17,6 +20,8 @@ class Enemy:
         self.start_pos = start_pos
         self.x = float(start_pos[0])
         self.y = float(start_pos[1])
+        self.previous_x = self.x  # 上一次模拟步的位置，用于渲染插值
+        self.previous_y = self.y
         self.path = path
         self.speed = speed
         self.current_target = 0
@@ -33,11 +38,13 @@ class Enemy:
         # 路径查找
         self.path_to_player = []
         self.path_update_timer = 0
+        self.path_planner = None  # 后台寻路服务，为None时在当前帧同步寻路
 
     def reset(self):
         """重置敌人状态"""
         self.x = float(self.start_pos[0])
         self.y = float(self.start_pos[1])
+        self.store_previous_position()
         self.current_target = 0
         self.mode = "PATROL"
         self.chase_target = None
@@ -47,7 +54,7 @@ class Enemy:
         self.animation_frame = 0
         self.animation_timer = 0
 
-    def update(self, dt, player, level_data):
+    def update(self, dt, player, level_data, flow_field=None):
         """更新敌人状态"""
         # 更新动画
         self.animation_timer += dt
@@ -67,15 +74,26 @@ class Enemy:
 
         # 根据模式更新移动
         if self.mode == "CHASE":
-            self.update_chase(dt, player, level_data)
+            self.update_chase(dt, player, level_data, flow_field)
         else:
             self.update_patrol(dt, level_data)
 
     def update_patrol(self, dt, level_data):
-        """更新巡逻移动"""
+        """更新巡逻移动
+        降频更新时 dt 是累积的多个模拟步，按模拟步长分段移动，到达巡逻点后剩下的时间继续沿下一段移动，
+        轨迹与逐帧更新相同
+        """
         if not self.path or len(self.path) == 0:
             return
 
+        steps = max(1, round(dt * GameConfig.SIMULATION_RATE / 1000))
+        step_dt = dt / steps
+        for _ in range(steps):
+            self.patrol_step(step_dt, level_data)
+
+    def patrol_step(self, dt, level_data):
+        """执行一个模拟步的巡逻移动"""
+
         # 获取当前目标点
         target = self.path[self.current_target]
         dx = target[0] - self.x
@@ -103,13 +121,10 @@ class Enemy:
                 self.x = new_x
                 self.y = new_y
 
-    def update_chase(self, dt, player, level_data):
+    def update_chase(self, dt, player, level_data, flow_field=None):
         """更新追击移动"""
         # 定期更新到玩家的路径
-        self.path_update_timer += dt
-        if self.path_update_timer >= 500:  # 每500ms更新一次路径
-            self.path_to_player = self.find_path_to_player(player, level_data)
-            self.path_update_timer = 0
+        self.update_chase_path(dt, player, level_data, flow_field)
 
         # 如果有路径，沿着路径移动
         if self.path_to_player and len(self.path_to_player) > 1:
@@ -159,36 +174,36 @@ class Enemy:
                     self.x = new_x
                     self.y = new_y
 
+    def update_chase_path(self, dt, player, level_data, flow_field=None):
+        """累计计时并定期刷新到玩家的路径"""
+        self.path_update_timer += dt
+        if self.path_update_timer >= 500:  # 每500ms更新一次路径
+            path = []
+            # 优先从共享距离场读取路径，不在覆盖范围内时再单独寻路
+            if flow_field is not None:
+                path = flow_field.get_path((int(self.x), int(self.y)))
+            if path:
+                self.path_to_player = path
+            elif self.path_planner is not None:
+                # 提交到后台，新路径送达前继续沿旧路径移动
+                self.path_planner.submit(self, get_level_grid(level_data),
+                                         (int(self.x), int(self.y)), (int(player.x), int(player.y)))
+            else:
+                self.path_to_player = self.find_path_to_player(player, level_data)
+            self.path_update_timer = 0
+
     def find_path_to_player(self, player, level_data):
-        """使用BFS算法找到通往玩家的路径"""
+        """使用A*算法找到通往玩家的路径"""
         start = (int(self.x), int(self.y))
         goal = (int(player.x), int(player.y))
+        return find_path(get_level_grid(level_data), start, goal)
 
-        if start == goal:
-            return [start]
-
-        # BFS搜索
-        queue = deque([(start, [start])])
-        visited = {start}
-
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        max_search_depth = 20  # 限制搜索深度
-
-        while queue and len(visited) < max_search_depth * max_search_depth:
-            (x, y), path = queue.popleft()
-
-            if (x, y) == goal:
-                return path
-
-            for dx, dy in directions:
-                nx, ny = x + dx, y + dy
-
-                if (nx, ny) not in visited and self.can_move_to(nx, ny, level_data):
-                    visited.add((nx, ny))
-                    new_path = path + [(nx, ny)]
-                    queue.append(((nx, ny), new_path))
-
-        return []  # 没有找到路径
+    def receive_path(self, path):
+        """接收后台寻路的结果，去掉敌人在等待期间已经走过的路段"""
+        current = (int(self.x), int(self.y))
+        if current in path:
+            path = path[path.index(current):]
+        self.path_to_player = list(path)
 
     def can_move_to(self, x, y, level_data):
         """检查是否可以移动到指定位置"""
@@ -196,17 +211,8 @@ class Enemy:
         if x < 0 or y < 0 or x >= level_data["width"] or y >= level_data["height"]:
             return False
 
-        # 检查墙壁碰撞
-        enemy_rect = pygame.Rect(x * GameConfig.TILE_SIZE, y * GameConfig.TILE_SIZE,
-                                 GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
-
-        for wall in level_data["walls"]:
-            wall_rect = pygame.Rect(wall[0] * GameConfig.TILE_SIZE, wall[1] * GameConfig.TILE_SIZE,
-                                    wall[2] * GameConfig.TILE_SIZE, wall[3] * GameConfig.TILE_SIZE)
-            if enemy_rect.colliderect(wall_rect):
-                return False
-
-        return True
+        # 检查墙壁碰撞 - 敌人占据一个瓦片大小的区域
+        return not get_level_grid(level_data).is_area_blocked(x, y)
 
     def distance_to_player(self, player):
         """计算到玩家的距离"""
@@ -220,16 +226,41 @@ class Enemy:
         dy = abs(self.y - player.y)
         return dx < 0.8 and dy < 0.8  # 允许一些重叠
 
+    def store_previous_position(self):
+        """记录模拟步开始前的位置，用于渲染插值"""
+        self.previous_x = self.x
+        self.previous_y = self.y
+
+    def get_render_position(self, alpha):
+        """获取绘制位置：在上一次和本次模拟步的位置之间按 alpha 插值"""
+        if alpha >= 1:
+            return self.x, self.y
+        return (self.previous_x + (self.x - self.previous_x) * alpha,
+                self.previous_y + (self.y - self.previous_y) * alpha)
+
     def get_rect(self):
         """获取敌人矩形"""
         return pygame.Rect(self.x * GameConfig.TILE_SIZE, self.y * GameConfig.TILE_SIZE,
                            GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
 
-    def draw(self, screen, offset_x, offset_y):
-        """绘制敌人"""
-        x = self.x * GameConfig.TILE_SIZE + offset_x
-        y = self.y * GameConfig.TILE_SIZE + offset_y
+    def get_dirty_rect(self, offset_x, offset_y, alpha=1.0):
+        """获取敌人在屏幕上绘制的范围，包括摆动动画和头顶的警告标志"""
+        render_x, render_y = self.get_render_position(alpha)
+        x = render_x * GameConfig.TILE_SIZE + offset_x
+        y = render_y * GameConfig.TILE_SIZE + offset_y
+        return pygame.Rect(x - 1, y - 17, GameConfig.TILE_SIZE + 3, GameConfig.TILE_SIZE + 18)
+
+    def draw(self, screen, offset_x, offset_y, alpha=1.0):
+        """绘制敌人，alpha 为两次模拟步之间的插值系数"""
+        render_x, render_y = self.get_render_position(alpha)
+        x = render_x * GameConfig.TILE_SIZE + offset_x
+        y = render_y * GameConfig.TILE_SIZE + offset_y
+
+        key = ("enemy", self.mode, self.animation_frame % 2)
+        sprite_cache.blit(screen, key, x, y, self.draw_shape)
 
+    def draw_shape(self, screen, x, y):
+        """用基本图形绘制敌人，结果由精灵缓存保存"""
         # 敌人矩形
         enemy_rect = pygame.Rect(x, y, GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
 
@@ -285,7 +316,7 @@ class Enemy:
                                (int(x + 16), int(y - 8)), 6)
 
             # 感叹号
-            font = pygame.font.Font(None, 16)
-            text = font.render("!", True, GameConfig.COLORS["WHITE"])
+            font = text_cache.get_font(None, 16)
+            text = text_cache.render(font, "!", GameConfig.COLORS["WHITE"])
             text_rect = text.get_rect(center=(x + 16, y - 8))
             screen.blit(text, text_rect)
\ No newline at end of file
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+敌人系统
+以结构数组（NumPy数组）保存所有敌人的位置、速度、模式和巡逻进度，
+每帧一次性批量计算距离、模式切换和移动，行为与逐个调用 Enemy.update 相同
+"""
+
+import math
+from config import GameConfig
+from level_manager import get_level_grid
+from numpy_support import np  # 没有安装 NumPy 时游戏引擎继续逐个更新敌人
+
+
+class EnemySystem:
+    """批量更新的敌人系统
+    数组是敌人状态的权威数据，每帧结束时把绘制需要的字段写回 Enemy 对象；
+    追击路径仍保存在各个 Enemy 对象上，只有追击中的敌人需要逐个刷新路径
+    """
+
+    def __init__(self, enemies):
+        """根据敌人对象创建结构数组"""
+        self.enemies = list(enemies)
+
+        self.x = np.array([enemy.x for enemy in self.enemies], dtype=np.float64)
+        self.y = np.array([enemy.y for enemy in self.enemies], dtype=np.float64)
+        self.speed = np.array([enemy.speed for enemy in self.enemies], dtype=np.float64)
+        self.chasing = np.array([enemy.mode == "CHASE" for enemy in self.enemies], dtype=bool)
+        self.current_target = np.array([enemy.current_target for enemy in self.enemies], dtype=np.int64)
+        self.animation_frame = np.array([enemy.animation_frame for enemy in self.enemies], dtype=np.int64)
+        self.animation_timer = np.array([enemy.animation_timer for enemy in self.enemies], dtype=np.float64)
+
+        # 巡逻路径展平成一维数组，用偏移和长度定位每个敌人的路径
+        lengths = [len(enemy.path) if enemy.path else 0 for enemy in self.enemies]
+        self.path_length = np.array(lengths, dtype=np.int64)
+        self.path_offset = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+        points = [point for enemy in self.enemies if enemy.path for point in enemy.path]
+        self.path_x = np.array([point[0] for point in points], dtype=np.float64)
+        self.path_y = np.array([point[1] for point in points], dtype=np.float64)
+
+        # 上次写入空间索引时每个敌人所在的分块，尚未写入时为None
+        self.chunk_x = None
+        self.chunk_y = None
+
+    def __len__(self):
+        return len(self.enemies)
+
+    def update(self, dt, player, level_data, flow_field=None):
+        """批量更新所有敌人
+
+        dt 可以是统一的时间增量，也可以是每个敌人各自的增量数组，增量为0的敌人本帧跳过
+        """
+        if not self.enemies:
+            return
+        grid = get_level_grid(level_data)
+        dt = np.broadcast_to(np.asarray(dt, dtype=np.float64), self.x.shape)
+        active = dt > 0
+
+        # 更新动画
+        self.animation_timer += dt
+        advance = active & (self.animation_timer >= 1000 / GameConfig.ANIMATION_SPEED)
+        self.animation_frame[advance] = (self.animation_frame[advance] + 1) % 4
+        self.animation_timer[advance] = 0
+
+        # 检查是否应该追击玩家
+        dx = self.x - player.x
+        dy = self.y - player.y
+        player_distance = np.sqrt(dx * dx + dy * dy)
+        start_chase = active & (player_distance <= GameConfig.ENEMY_CHASE_DISTANCE)
+        stop_chase = active & (player_distance > GameConfig.ENEMY_CHASE_DISTANCE * 1.5)
+        self.chasing = (self.chasing | start_chase) & ~stop_chase
+
+        # 收集本帧需要移动的敌人：编号、方向、距离和移动步长
+        chase_moves = self.collect_chase_moves(dt, active, player, level_data, flow_field)
+        self.apply_moves(grid, chase_moves)
+        self.update_patrol(grid, dt, active)
+
+        self.write_back(player, start_chase, stop_chase)
+
+    def update_patrol(self, grid, dt, active):
+        """更新巡逻中敌人的移动
+        与 Enemy.update_patrol 相同，累积的 dt 按模拟步长分段，每轮只处理还有剩余步数的敌人
+        """
+        patrolling = active & ~self.chasing & (self.path_length > 0)
+        remaining = np.where(patrolling, np.maximum(1, np.rint(dt * GameConfig.SIMULATION_RATE / 1000)), 0)
+        step_dt = dt / np.maximum(remaining, 1)
+        while True:
+            indices = np.nonzero(remaining > 0)[0]
+            if not indices.size:
+                break
+            self.apply_moves(grid, self.collect_patrol_moves(indices, step_dt))
+            remaining[indices] -= 1
+
+    def collect_patrol_moves(self, indices, dt):
+        """计算巡逻中敌人一个模拟步的移动，到达巡逻点的敌人切换到下一个点"""
+        points = self.path_offset[indices] + self.current_target[indices]
+        dx = self.path_x[points] - self.x[indices]
+        dy = self.path_y[points] - self.y[indices]
+        distance = np.sqrt(dx * dx + dy * dy)
+
+        # 到达目标点，切换到下一个
+        arrived = distance < 0.1
+        arrived_indices = indices[arrived]
+        self.current_target[arrived_indices] = (self.current_target[arrived_indices] + 1) % \
+            self.path_length[arrived_indices]
+
+        moving = ~arrived
+        indices = indices[moving]
+        step = self.speed[indices] * dt[indices] / 1000
+        return indices, dx[moving], dy[moving], distance[moving], step
+
+    def collect_chase_moves(self, dt, active, player, level_data, flow_field):
+        """逐个刷新追击中敌人的路径，计算它们本帧的移动"""
+        indices = []
+        directions_x = []
+        directions_y = []
+        distances = []
+        steps = []
+
+        for index in np.nonzero(active & self.chasing)[0].tolist():
+            enemy = self.enemies[index]
+            enemy_dt = float(dt[index])
+            enemy.x = float(self.x[index])
+            enemy.y = float(self.y[index])
+            enemy.update_chase_path(enemy_dt, player, level_data, flow_field)
+
+            # 与 Enemy.update_chase 相同：有路径时沿路径加速移动，否则直接向玩家移动
+            if enemy.path_to_player and len(enemy.path_to_player) > 1:
+                target = enemy.path_to_player[1]
+                dx = target[0] - enemy.x
+                dy = target[1] - enemy.y
+                distance = math.sqrt(dx * dx + dy * dy)
+                if distance < 0.1:
+                    enemy.path_to_player.pop(0)
+                    continue
+                step = enemy.speed * 1.5 * enemy_dt / 1000
+            else:
+                dx = player.x - enemy.x
+                dy = player.y - enemy.y
+                distance = math.sqrt(dx * dx + dy * dy)
+                if distance <= 0.1:
+                    continue
+                step = enemy.speed * enemy_dt / 1000
+
+            indices.append(index)
+            directions_x.append(dx)
+            directions_y.append(dy)
+            distances.append(distance)
+            steps.append(step)
+
+        return (np.array(indices, dtype=np.int64), np.array(directions_x, dtype=np.float64),
+                np.array(directions_y, dtype=np.float64), np.array(distances, dtype=np.float64),
+                np.array(steps, dtype=np.float64))
+
+    def apply_moves(self, grid, *moves):
+        """一次性计算所有移动的新位置并做碰撞检查"""
+        indices, dx, dy, distance, step = (np.concatenate(parts) for parts in zip(*moves))
+        if not indices.size:
+            return
+
+        move_distance = np.minimum(step, distance)
+        new_x = self.x[indices] + dx / distance * move_distance
+        new_y = self.y[indices] + dy / distance * move_distance
+
+        allowed = ~self.area_blocked(grid, new_x, new_y)
+        self.x[indices[allowed]] = new_x[allowed]
+        self.y[indices[allowed]] = new_y[allowed]
+
+    def area_blocked(self, grid, x, y):
+        """批量版本的 LevelGrid.is_area_blocked"""
+        width = grid.width
+        height = grid.height
+        outside = (x < 0) | (y < 0) | (x >= width) | (y >= height)
+
+        tile = GameConfig.TILE_SIZE
+        pixel_x = (np.clip(x, 0, width - 1) * tile).astype(np.int64)
+        pixel_y = (np.clip(y, 0, height - 1) * tile).astype(np.int64)
+        x0 = pixel_x // tile
+        y0 = pixel_y // tile
+        x1 = np.minimum((pixel_x + tile - 1) // tile, width - 1)
+        y1 = np.minimum((pixel_y + tile - 1) // tile, height - 1)
+
+        blocked = np.frombuffer(grid.blocked, dtype=np.uint8).reshape(height, width)
+        hit = (blocked[y0, x0] | blocked[y0, x1] | blocked[y1, x0] | blocked[y1, x1]) != 0
+        return outside | hit
+
+    def write_back(self, player, start_chase, stop_chase):
+        """把绘制和碰撞需要的状态写回 Enemy 对象"""
+        chase_target = (player.x, player.y)
+        for enemy, x, y, chasing, frame, target, started, stopped in zip(
+                self.enemies, self.x.tolist(), self.y.tolist(), self.chasing.tolist(),
+                self.animation_frame.tolist(), self.current_target.tolist(),
+                start_chase.tolist(), stop_chase.tolist()):
+            enemy.x = x
+            enemy.y = y
+            enemy.mode = "CHASE" if chasing else "PATROL"
+            enemy.animation_frame = frame
+            enemy.current_target = target
+            if started:
+                enemy.chase_target = chase_target
+            elif stopped:
+                enemy.chase_target = None
+
+    def update_spatial_index(self, spatial_index):
+        """只把跨越了分块的敌人在空间索引中移动到新的分块"""
+        size = spatial_index.chunk_size
+        chunk_x = self.x.astype(np.int64) // size
+        chunk_y = self.y.astype(np.int64) // size
+        if self.chunk_x is None:
+            changed = range(len(self.enemies))
+        else:
+            changed = np.nonzero((chunk_x != self.chunk_x) | (chunk_y != self.chunk_y))[0].tolist()
+        for index in changed:
+            enemy = self.enemies[index]
+            spatial_index.move("enemy", enemy, enemy.x, enemy.y)
+        self.chunk_x = chunk_x
+        self.chunk_y = chunk_y
+
+    def first_collision(self, player):
+        """返回第一个与玩家碰撞的敌人，没有则返回None"""
+        if not self.enemies:
+            return None
+        hits = np.nonzero((np.abs(self.x - player.x) < 0.8) & (np.abs(self.y - player.y) < 0.8))[0]
+        return self.enemies[hits[0]] if hits.size else None
\ No newline at end of file
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+逐帧性能分析
+把每一帧的耗时按子系统（事件、玩家、敌人、碰撞、粒子、摄像机、地形、实体、HUD、小地图、刷新）
+记录到固定大小的环形缓冲区，可以在游戏中显示统计叠加层，也可以导出到文件离线分析。
+关闭时各处的打点只剩一次属性判断
+"""
+
+import csv
+import math
+import time
+from array import array
+from config import GameConfig
+
+
+class FrameProfiler:
+    """逐帧性能分析器
+    每帧以 begin_frame() 开始、end_frame() 结束；mark(name) 把距上一次打点经过的时间计入 name 一项，
+    同一帧内多次打点同一项时累加（例如一帧执行了多次模拟步）
+    """
+
+    SECTIONS = ("events", "player", "enemies", "collisions", "particles", "camera",
+                "terrain", "entities", "hud", "minimap", "flip")
+
+    def __init__(self, capacity=None):
+        """初始化分析器"""
+        if capacity is None:
+            capacity = GameConfig.PROFILER_CAPACITY
+        self.capacity = capacity
+        self.enabled = False
+
+        # 环形缓冲区：每帧一行，依次是整帧耗时和各项耗时（毫秒）
+        self.columns = ("frame",) + self.SECTIONS
+        self.section_index = {name: index + 1 for index, name in enumerate(self.SECTIONS)}
+        self.samples = array("d", bytes(8 * capacity * len(self.columns)))
+        self.frames = 0  # 已记录的帧数，下一帧写入第 frames % capacity 行
+
+        # 当前帧的数据
+        self.current = [0.0] * len(self.columns)
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+
+    def set_enabled(self, enabled):
+        """开启或关闭记录，开启时从当前时刻开始计时"""
+        self.enabled = enabled
+        if enabled:
+            self.begin_frame()
+
+    def begin_frame(self):
+        """开始记录一帧"""
+        self.current = [0.0] * len(self.columns)
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def mark(self, name):
+        """把距上一次打点经过的时间计入 name 一项"""
+        now = time.perf_counter()
+        self.current[self.section_index[name]] += (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end_frame(self):
+        """结束当前帧，写入环形缓冲区"""
+        current = self.current
+        current[0] = (time.perf_counter() - self.frame_start) * 1000
+        width = len(self.columns)
+        row = (self.frames % self.capacity) * width
+        self.samples[row:row + width] = array("d", current)
+        self.frames += 1
+
+    def __len__(self):
+        return min(self.frames, self.capacity)
+
+    def get_column(self, name):
+        """获取某一项在缓冲区中的全部记录，按从旧到新的顺序"""
+        width = len(self.columns)
+        column = self.columns.index(name)
+        values = self.samples[column::width]
+        if self.frames <= self.capacity:
+            return list(values[:self.frames])
+        start = self.frames % self.capacity
+        return list(values[start:]) + list(values[:start])
+
+    def get_percentiles(self, percentiles=(50, 99)):
+        """获取整帧和各项耗时的百分位数 {名称: (p50, p99)}"""
+        stats = {}
+        for name in self.columns:
+            values = sorted(self.get_column(name))
+            if not values:
+                stats[name] = tuple(0.0 for _ in percentiles)
+                continue
+            stats[name] = tuple(values[max(0, math.ceil(percentile / 100 * len(values)) - 1)]
+                                for percentile in percentiles)
+        return stats
+
+    def export(self, path=None):
+        """把缓冲区导出为 CSV 文件，每帧一行，单位为毫秒"""
+        if path is None:
+            path = GameConfig.PROFILER_EXPORT_FILE
+        columns = [self.get_column(name) for name in self.columns]
+        first_frame = self.frames - len(self)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("index",) + self.columns)
+            for offset, row in enumerate(zip(*columns)):
+                writer.writerow([first_frame + offset] + [f"{value:.4f}" for value in row])
+        return path
+
+    def clear(self):
+        """清空记录"""
+        self.samples = array("d", bytes(8 * self.capacity * len(self.columns)))
+        self.frames = 0
+
+
+# 全局共享的性能分析器
+frame_profiler = FrameProfiler()
\ No newline at end of file
@@ -10,6 +10,18 @@ import math
 from player import Player
 from enemy import Enemy
 from config import GameConfig
+from level_manager import get_level_grid
+from pathfinding import FlowField, get_backend_name
+from path_workers import PathWorkerPool
+from path_scheduler import PathRequestScheduler
+from enemy_system import EnemySystem
+from ai_scheduler import AILODScheduler
+from level_chunks import LevelChunkCache
+from sprite_cache import sprite_cache
+from particles import ParticlePool
+from spatial_index import SpatialIndex
+from frame_profiler import frame_profiler
+from numpy_support import np
 
 
 class PowerUp:
@@ -37,6 +49,24 @@ class PowerUp:
         if abs(self.float_offset) > 3:
             self.float_direction *= -1
 
+    def get_dirty_rect(self, offset_x, offset_y):
+        """获取道具在屏幕上绘制的范围，包括浮动和发光效果"""
+        if self.collected:
+            return None
+        x = self.x * GameConfig.TILE_SIZE + offset_x
+        y = self.y * GameConfig.TILE_SIZE + offset_y + self.float_offset
+        return pygame.Rect(x - 5, y - 5, GameConfig.TILE_SIZE + 10, GameConfig.TILE_SIZE + 10)
+
+    def get_color(self):
+        """获取道具类型对应的颜色"""
+        if self.type == "speed":
+            return GameConfig.COLORS[GameConfig.ELEMENT_COLORS["POWER_UP_SPEED"]]
+        elif self.type == "score":
+            return GameConfig.COLORS[GameConfig.ELEMENT_COLORS["POWER_UP_SCORE"]]
+        elif self.type == "invincible":
+            return GameConfig.COLORS[GameConfig.ELEMENT_COLORS["POWER_UP_INVINCIBLE"]]
+        return None
+
     def draw(self, screen, offset_x, offset_y):
         """绘制道具"""
         if self.collected:
@@ -44,10 +74,21 @@ class PowerUp:
 
         x = self.x * GameConfig.TILE_SIZE + offset_x
         y = self.y * GameConfig.TILE_SIZE + offset_y + self.float_offset
+        color = self.get_color()
+        if color is None:
+            return
 
-        # 根据类型选择颜色和形状
+        sprite_cache.blit(screen, ("power_up", self.type), x, y, self.draw_shape)
+
+        # 发光效果
+        if self.animation_frame < 4:
+            glow_size = (GameConfig.TILE_SIZE + 8, GameConfig.TILE_SIZE + 8)
+            screen.blit(sprite_cache.get_translucent(color, glow_size, 50), (x - 4, y - 4))
+
+    def draw_shape(self, screen, x, y):
+        """用基本图形绘制道具，结果由精灵缓存保存"""
+        color = self.get_color()
         if self.type == "speed":
-            color = GameConfig.COLORS[GameConfig.ELEMENT_COLORS["POWER_UP_SPEED"]]
             # 绘制闪电符号
             points = [
                 (x + 10, y + 5), (x + 15, y + 12), (x + 12, y + 15),
@@ -57,7 +98,6 @@ class PowerUp:
             pygame.draw.polygon(screen, GameConfig.COLORS["WHITE"], points, 2)
 
         elif self.type == "score":
-            color = GameConfig.COLORS[GameConfig.ELEMENT_COLORS["POWER_UP_SCORE"]]
             # 绘制钻石
             center_x, center_y = x + 16, y + 16
             points = [
@@ -70,33 +110,49 @@ class PowerUp:
             pygame.draw.polygon(screen, GameConfig.COLORS["WHITE"], points, 2)
 
         elif self.type == "invincible":
-            color = GameConfig.COLORS[GameConfig.ELEMENT_COLORS["POWER_UP_INVINCIBLE"]]
             # 绘制盾牌
             center_x, center_y = x + 16, y + 16
             pygame.draw.circle(screen, color, (center_x, center_y), 12)
             pygame.draw.circle(screen, GameConfig.COLORS["WHITE"], (center_x, center_y), 12, 3)
             pygame.draw.circle(screen, GameConfig.COLORS["WHITE"], (center_x, center_y), 6)
 
-        # 发光效果
-        if self.animation_frame < 4:
-            glow_surface = pygame.Surface((GameConfig.TILE_SIZE + 8, GameConfig.TILE_SIZE + 8))
-            glow_surface.set_alpha(50)
-            glow_surface.fill(color)
-            screen.blit(glow_surface, (x - 4, y - 4))
-
 
 class GameEngine:
-    def __init__(self, screen, level_manager, ui_manager):
-        """初始化游戏引擎"""
+    def __init__(self, screen, level_manager, ui_manager, input_source=None):
+        """初始化游戏引擎
+        screen 为None时是无界面模式：只运行模拟，跳过所有绘制，input_source 提供玩家的按键状态
+        """
         self.screen = screen
         self.level_manager = level_manager
         self.ui_manager = ui_manager
+        self.input_source = input_source
+
+        # 摄像机视野按屏幕大小计算，无界面模式使用配置的屏幕大小
+        if screen is not None:
+            self.view_width, self.view_height = screen.get_size()
+        else:
+            self.view_width, self.view_height = GameConfig.SCREEN_WIDTH, GameConfig.SCREEN_HEIGHT
 
         # 游戏对象
         self.player = None
         self.enemies = []
         self.power_ups = []
 
+        # 敌人很多时使用的批量更新系统
+        self.enemy_system = None
+
+        # 远处敌人降频更新的调度器
+        self.ai_scheduler = AILODScheduler()
+
+        # 追击敌人共享的距离场
+        self.flow_field = FlowField()
+
+        # 大地图使用的后台寻路进程池
+        self.path_pool = None
+
+        # 敌人很多时把寻路分摊到多帧的调度器
+        self.path_scheduler = None
+
         # 游戏状态
         self.game_time = 0
         self.score_timer = 0
@@ -104,9 +160,27 @@ class GameEngine:
         # 渲染偏移
         self.camera_x = 0
         self.camera_y = 0
+        self.previous_camera = (0, 0)  # 上一次模拟步的摄像机位置，用于渲染插值
 
         # 粒子效果
-        self.particles = []
+        self.particles = ParticlePool()
+
+        # 预渲染的静态关卡表面及其对应的 (关卡, 墙壁版本号)
+        self.level_surface = None
+        self.level_surface_key = None
+        self.lit_trap_tiles = []
+
+        # 超大关卡使用的分块渲染缓存
+        self.level_chunks = None
+
+        # 渲染时按可见范围查询陷阱、道具和敌人的空间索引
+        self.spatial_index = SpatialIndex()
+
+        # 脏矩形渲染：本帧和上一帧变化的屏幕区域，需要整屏刷新时为None
+        self.dirty_rects = None
+        self.previous_dirty_rects = None
+        self.last_render_camera = None
+        self.last_trap_lit = None
 
         # 音效（如果有的话）
         self.sound_enabled = False
@@ -119,7 +193,7 @@ class GameEngine:
 
         # 重置玩家
         start_pos = level_data["player_start"]
-        self.player = Player(start_pos[0], start_pos[1])
+        self.player = Player(start_pos[0], start_pos[1], self.input_source)
 
         # 重置敌人
         self.enemies = []
@@ -127,27 +201,90 @@ class GameEngine:
             enemy = Enemy(enemy_data["start"], enemy_data["path"], enemy_data["speed"])
             self.enemies.append(enemy)
 
+        self.enemy_system = None
+        if np is not None and len(self.enemies) >= GameConfig.ENEMY_SYSTEM_MIN_COUNT:
+            self.enemy_system = EnemySystem(self.enemies)
+        self.ai_scheduler.reset(len(self.enemies))
+
         # 重置道具
         self.power_ups = []
         for power_up_data in level_data["power_ups"]:
             power_up = PowerUp(power_up_data["type"], power_up_data["position"])
             self.power_ups.append(power_up)
+        get_level_grid(level_data).index_power_ups(self.power_ups)
+
+        # 重建空间索引
+        self.build_spatial_index(level_data)
+
+        # 重置距离场
+        self.flow_field = FlowField()
+
+        # 大地图把寻路请求交给后台进程
+        self.setup_path_pool(level_data)
 
         # 重置游戏状态
         self.game_time = 0
         self.score_timer = 0
-        self.particles = []
+        self.particles.clear()
+
+        # 预渲染静态关卡
+        if self.screen is not None:
+            self.build_level_surface(level_data)
+            self.last_render_camera = None
+            self.ui_manager.reset_mini_map()
 
         # 重置摄像机
         self.update_camera()
+        self.previous_camera = (self.camera_x, self.camera_y)
+
+    def setup_path_pool(self, level_data):
+        """根据关卡大小和敌人数量决定寻路请求的执行方式"""
+        grid = get_level_grid(level_data)
+        use_pool = (GameConfig.PATH_WORKER_COUNT > 0 and
+                    grid.width * grid.height >= GameConfig.ASYNC_PATHFINDING_MIN_CELLS)
+
+        if use_pool:
+            if self.path_pool is None:
+                self.path_pool = PathWorkerPool()
+            # 重新开始关卡时旧的敌人对象已经丢弃，即使保留进程池也要清掉它们的请求
+            self.path_pool.cancel_all()
+            self.path_pool.prepare(grid)
+        elif self.path_pool is not None:
+            self.path_pool.shutdown()
+            self.path_pool = None
+
+        # 敌人很多时同一帧可能集中出现大量寻路请求，分摊到多帧执行；
+        # 分帧搜索是普通的A*，只用于选择了A*的关卡，分层寻路和JPS仍然直接调用 find_path
+        self.path_scheduler = None
+        planner = self.path_pool
+        if (planner is None and len(self.enemies) >= GameConfig.PATH_BUDGET_MIN_ENEMIES and
+                get_backend_name(grid) == "astar"):
+            self.path_scheduler = PathRequestScheduler()
+            planner = self.path_scheduler
 
-    def update(self):
-        """更新游戏逻辑"""
+        for enemy in self.enemies:
+            enemy.path_planner = planner
+
+    def shutdown(self):
+        """释放后台资源"""
+        if self.path_pool is not None:
+            self.path_pool.shutdown()
+            self.path_pool = None
+        if self.path_scheduler is not None:
+            self.path_scheduler.shutdown()
+            self.path_scheduler = None
+
+    def update(self, dt=None):
+        """执行一次固定时间步长的模拟，dt 为毫秒"""
         if not self.player:
             return "GAME_OVER"
 
-        # 获取时间增量
-        dt = 1000 / GameConfig.FPS  # 固定时间步长
+        # 固定时间步长，与渲染帧率无关
+        if dt is None:
+            dt = 1000 / GameConfig.SIMULATION_RATE
+
+        # 记录模拟前的位置，渲染时在两次模拟步之间插值
+        self.store_previous_positions()
 
         # 更新游戏时间
         self.game_time += dt / 1000
@@ -168,10 +305,40 @@ class GameEngine:
 
         # 检查地形效果
         self.player.check_tile_effects(level_data)
-
-        # 更新敌人
-        for enemy in self.enemies:
-            enemy.update(dt, self.player, level_data)
+        if frame_profiler.enabled:
+            frame_profiler.mark("player")
+
+        # 送回后台寻路的结果
+        if self.path_pool is not None:
+            self.path_pool.poll()
+
+        # 在本帧预算内推进排队的寻路请求
+        if self.path_scheduler is not None:
+            self.path_scheduler.poll()
+
+        # 更新距离场目标，只有玩家换格子时才会在下次读取时重新计算
+        self.flow_field.set_goal(get_level_grid(level_data), (int(self.player.x), int(self.player.y)))
+
+        # 更新敌人，远处的敌人按LOD分层降频更新
+        if not GameConfig.AI_LOD_ENABLED:
+            enemy_dts = dt if self.enemy_system is not None else [dt] * len(self.enemies)
+        elif self.enemy_system is not None:
+            enemy_dts = self.ai_scheduler.schedule_arrays(dt, self.enemy_system.x, self.enemy_system.y,
+                                                          self.player, self.get_visible_bounds())
+        else:
+            enemy_dts = self.ai_scheduler.schedule(dt, self.enemies, self.player, self.get_visible_bounds())
+
+        # 敌人跨越分块时在空间索引中移动，渲染时只需查询可见的分块
+        if self.enemy_system is not None:
+            self.enemy_system.update(enemy_dts, self.player, level_data, self.flow_field)
+            self.enemy_system.update_spatial_index(self.spatial_index)
+        else:
+            for enemy, enemy_dt in zip(self.enemies, enemy_dts):
+                if enemy_dt > 0:
+                    enemy.update(enemy_dt, self.player, level_data, self.flow_field)
+                    self.spatial_index.move("enemy", enemy, enemy.x, enemy.y)
+        if frame_profiler.enabled:
+            frame_profiler.mark("enemies")
 
         # 更新道具
         for power_up in self.power_ups:
@@ -179,12 +346,18 @@ class GameEngine:
 
         # 更新粒子效果
         self.update_particles(dt)
+        if frame_profiler.enabled:
+            frame_profiler.mark("particles")
 
         # 检查碰撞
         self.check_collisions()
+        if frame_profiler.enabled:
+            frame_profiler.mark("collisions")
 
         # 更新摄像机
         self.update_camera()
+        if frame_profiler.enabled:
+            frame_profiler.mark("camera")
 
         # 检查游戏结束条件
         if self.player.lives <= 0:
@@ -198,54 +371,58 @@ class GameEngine:
 
         return "PLAYING"
 
+    def store_previous_positions(self):
+        """记录玩家、敌人和摄像机在本次模拟步开始前的位置"""
+        self.previous_camera = (self.camera_x, self.camera_y)
+        self.player.store_previous_position()
+        for enemy in self.enemies:
+            enemy.store_previous_position()
+
+    def get_render_camera(self, alpha):
+        """获取绘制用的摄像机位置：在上一次和本次模拟步之间按 alpha 插值"""
+        if alpha >= 1:
+            return self.camera_x, self.camera_y
+        previous_x, previous_y = self.previous_camera
+        return (previous_x + (self.camera_x - previous_x) * alpha,
+                previous_y + (self.camera_y - previous_y) * alpha)
+
     def check_collisions(self):
         """检查所有碰撞"""
         # 检查玩家与敌人的碰撞
-        for enemy in self.enemies:
-            if enemy.collides_with_player(self.player):
+        if self.enemy_system is not None:
+            if self.enemy_system.first_collision(self.player) is not None:
                 self.player.hit_enemy()
-                # 创建碰撞粒子效果
                 self.create_particles(self.player.x, self.player.y, GameConfig.COLORS["RED"])
-                break
-
-        # 检查玩家与道具的碰撞
-        for power_up in self.power_ups:
-            if not power_up.collected:
-                player_grid_x = int(self.player.x)
-                player_grid_y = int(self.player.y)
-
-                if player_grid_x == power_up.x and player_grid_y == power_up.y:
-                    power_up.collected = True
-                    self.player.collect_power_up(power_up.type)
-                    # 创建收集粒子效果
-                    color = GameConfig.COLORS[GameConfig.ELEMENT_COLORS[f"POWER_UP_{power_up.type.upper()}"]]
-                    self.create_particles(power_up.x, power_up.y, color)
-
-    def create_particles(self, x, y, color, count=10):
+        else:
+            for enemy in self.enemies:
+                if enemy.collides_with_player(self.player):
+                    self.player.hit_enemy()
+                    # 创建碰撞粒子效果
+                    self.create_particles(self.player.x, self.player.y, GameConfig.COLORS["RED"])
+                    break
+
+        # 检查玩家与道具的碰撞 - 从道具索引中取出玩家所在格子的道具
+        level_data = self.level_manager.get_current_level()
+        grid = get_level_grid(level_data)
+        for power_up in grid.take_power_ups(int(self.player.x), int(self.player.y)):
+            power_up.collected = True
+            self.player.collect_power_up(power_up.type)
+            # 创建收集粒子效果
+            color = GameConfig.COLORS[GameConfig.ELEMENT_COLORS[f"POWER_UP_{power_up.type.upper()}"]]
+            self.create_particles(power_up.x, power_up.y, color)
+
+    def create_particles(self, x, y, color, count=None):
         """创建粒子效果"""
-        import random
-        for _ in range(count):
-            particle = {
-                "x": x * GameConfig.TILE_SIZE + GameConfig.TILE_SIZE // 2,
-                "y": y * GameConfig.TILE_SIZE + GameConfig.TILE_SIZE // 2,
-                "vx": random.uniform(-2, 2),
-                "vy": random.uniform(-2, 2),
-                "color": color,
-                "life": 1000,  # 1秒生命周期
-                "size": random.randint(2, 6)
-            }
-            self.particles.append(particle)
+        if self.screen is None:
+            return
+        if count is None:
+            count = GameConfig.PARTICLE_BURST_SIZE
+        self.particles.emit(x * GameConfig.TILE_SIZE + GameConfig.TILE_SIZE // 2,
+                            y * GameConfig.TILE_SIZE + GameConfig.TILE_SIZE // 2, color, count)
 
     def update_particles(self, dt):
         """更新粒子效果"""
-        for particle in self.particles[:]:  # 创建副本以便安全删除
-            particle["x"] += particle["vx"] * dt / 16
-            particle["y"] += particle["vy"] * dt / 16
-            particle["life"] -= dt
-            particle["size"] = max(1, particle["size"] - dt / 200)
-
-            if particle["life"] <= 0:
-                self.particles.remove(particle)
+        self.particles.update(dt)
 
     def update_camera(self):
         """更新摄像机位置"""
@@ -257,9 +434,9 @@ class GameEngine:
             return
 
         # 计算可视区域大小
-        view_width = (self.screen.get_width() - GameConfig.GRID_OFFSET_X * 2) // GameConfig.TILE_SIZE
+        view_width = (self.view_width - GameConfig.GRID_OFFSET_X * 2) // GameConfig.TILE_SIZE
         view_height = (
-                                  self.screen.get_height() - GameConfig.GRID_OFFSET_Y * 2 - GameConfig.UI_PANEL_HEIGHT) // GameConfig.TILE_SIZE
+                                  self.view_height - GameConfig.GRID_OFFSET_Y * 2 - GameConfig.UI_PANEL_HEIGHT) // GameConfig.TILE_SIZE
 
         # 摄像机跟随玩家
         target_x = self.player.x - view_width // 2
@@ -272,50 +449,214 @@ class GameEngine:
         self.camera_x = max(0, min(target_x, max_x))
         self.camera_y = max(0, min(target_y, max_y))
 
-    def render(self):
-        """渲染游戏画面"""
+        # 提前渲染摄像机附近的关卡分块
+        if self.level_chunks is not None:
+            self.level_chunks.prefetch(self.get_screen_tile_bounds(level_data))
+
+    def render(self, alpha=1.0):
+        """渲染游戏画面，alpha 为距上一次模拟步的时间占步长的比例，用于插值绘制位置"""
         level_data = self.level_manager.get_current_level()
-        if not level_data or not self.player:
+        if not level_data or not self.player or self.screen is None:
             return
 
-        # 计算渲染偏移
-        offset_x = GameConfig.GRID_OFFSET_X - self.camera_x * GameConfig.TILE_SIZE
-        offset_y = GameConfig.GRID_OFFSET_Y + GameConfig.UI_PANEL_HEIGHT - self.camera_y * GameConfig.TILE_SIZE
-
-        # 绘制背景
-        self.draw_background(offset_x, offset_y, level_data)
+        # 配置变化后重建实体精灵
+        sprite_cache.validate()
 
-        # 绘制地形元素
-        self.draw_terrain(offset_x, offset_y, level_data)
+        # 计算渲染偏移
+        camera = self.get_render_camera(alpha)
+        offset_x = GameConfig.GRID_OFFSET_X - camera[0] * GameConfig.TILE_SIZE
+        offset_y = GameConfig.GRID_OFFSET_Y + GameConfig.UI_PANEL_HEIGHT - camera[1] * GameConfig.TILE_SIZE
+
+        # 陷阱每500ms闪烁
+        trap_lit = (pygame.time.get_ticks() // 500) % 2 == 1
+
+        # 绘制静态的地面和地形，墙壁变化后重新预渲染
+        full_redraw = camera != self.last_render_camera
+        if self.level_surface_key != (id(level_data), get_level_grid(level_data).revision):
+            self.build_level_surface(level_data)
+            full_redraw = True
+        self.last_render_camera = camera
+        self.previous_dirty_rects = self.dirty_rects
+        self.dirty_rects = None if full_redraw or not GameConfig.DIRTY_RECT_RENDERING else []
+        base_x = math.floor(offset_x)
+        base_y = math.floor(offset_y)
+        render_bounds = self.get_render_bounds(level_data, camera)
+        if self.level_surface is not None:
+            self.screen.blit(self.level_surface, (base_x, base_y))
+            lit_trap_tiles = self.spatial_index.query("lit_trap", render_bounds) if trap_lit else []
+        else:
+            # 超大关卡只绘制屏幕范围内的分块
+            lit_trap_tiles = []
+            chunk_pixels = self.level_chunks.chunk_size * GameConfig.TILE_SIZE
+            for chunk_x, chunk_y in self.level_chunks.chunk_range(self.get_screen_tile_bounds(level_data, camera)):
+                surface, chunk_trap_tiles = self.level_chunks.get_chunk(chunk_x, chunk_y)
+                self.screen.blit(surface, (base_x + chunk_x * chunk_pixels, base_y + chunk_y * chunk_pixels))
+                lit_trap_tiles.extend(chunk_trap_tiles)
+
+        # 绘制动画地形元素
+        self.draw_terrain_overlay(offset_x, offset_y, level_data, lit_trap_tiles if trap_lit else [])
+        if self.dirty_rects is not None:
+            self.mark_terrain_dirty(offset_x, offset_y, level_data, trap_lit, render_bounds)
+        self.last_trap_lit = trap_lit
+        if frame_profiler.enabled:
+            frame_profiler.mark("terrain")
+
+        # 只绘制屏幕范围内的道具和敌人
+        visible_power_ups = self.spatial_index.query("power_up", render_bounds)
+        visible_enemies = self.spatial_index.query("enemy", render_bounds)
 
         # 绘制道具
-        for power_up in self.power_ups:
+        for power_up in visible_power_ups:
             power_up.draw(self.screen, offset_x, offset_y)
 
         # 绘制敌人
-        for enemy in self.enemies:
-            enemy.draw(self.screen, offset_x, offset_y)
+        for enemy in visible_enemies:
+            enemy.draw(self.screen, offset_x, offset_y, alpha)
 
         # 绘制玩家
-        self.player.draw(self.screen, offset_x, offset_y)
+        self.player.draw(self.screen, offset_x, offset_y, alpha)
+
+        if self.dirty_rects is not None:
+            for power_up in visible_power_ups:
+                rect = power_up.get_dirty_rect(offset_x, offset_y)
+                if rect is not None:
+                    self.dirty_rects.append(rect)
+            for entity in visible_enemies + [self.player]:
+                self.dirty_rects.append(entity.get_dirty_rect(offset_x, offset_y, alpha))
+        if frame_profiler.enabled:
+            frame_profiler.mark("entities")
 
         # 绘制粒子效果
         self.draw_particles(offset_x, offset_y)
+        if frame_profiler.enabled:
+            frame_profiler.mark("particles")
 
         # 绘制HUD
         level_name = self.level_manager.get_level_name()
-        self.ui_manager.draw_game_hud(self.player, level_name, self.game_time, self.level_manager.current_level_num)
+        hud_rect = self.ui_manager.draw_game_hud(self.player, level_name, self.game_time,
+                                                 self.level_manager.current_level_num)
+        if frame_profiler.enabled:
+            frame_profiler.mark("hud")
 
         # 绘制小地图
-        self.ui_manager.draw_mini_map(level_data, self.player, self.enemies, offset_x, offset_y)
+        mini_map_rect = self.ui_manager.draw_mini_map(level_data, self.player, self.enemies, offset_x, offset_y)
+        if frame_profiler.enabled:
+            frame_profiler.mark("minimap")
+
+        if self.dirty_rects is not None:
+            self.dirty_rects.extend(rect for rect in (hud_rect, mini_map_rect) if rect is not None)
+
+    def mark_terrain_dirty(self, offset_x, offset_y, level_data, trap_lit, render_bounds):
+        """记录本帧变化的地形区域：脉动的终点，以及切换闪烁状态时的陷阱"""
+        goal = level_data["goal"]
+        self.dirty_rects.append(pygame.Rect(goal[0] * GameConfig.TILE_SIZE + offset_x,
+                                            goal[1] * GameConfig.TILE_SIZE + offset_y,
+                                            GameConfig.TILE_SIZE, GameConfig.TILE_SIZE))
+        if trap_lit == self.last_trap_lit:
+            return
 
-    def draw_background(self, offset_x, offset_y, level_data):
+        screen_rect = self.screen.get_rect()
+        for trap in self.spatial_index.query("trap", render_bounds):
+            trap_rect = pygame.Rect(trap[0] * GameConfig.TILE_SIZE + offset_x, trap[1] * GameConfig.TILE_SIZE + offset_y,
+                                    GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
+            if screen_rect.colliderect(trap_rect):
+                self.dirty_rects.append(trap_rect)
+
+    def get_dirty_rects(self):
+        """获取需要送到显示器的区域（上一帧和本帧变化的区域），需要整屏刷新时返回None"""
+        if self.dirty_rects is None or self.previous_dirty_rects is None:
+            return None
+        return self.previous_dirty_rects + self.dirty_rects
+
+    def build_level_surface(self, level_data):
+        """把不会变化的地面、沼泽、陷阱和墙壁预先绘制到关卡表面上
+        陷阱按熄灭状态绘制，点亮状态的瓦片单独预渲染，闪烁时直接覆盖上去
+        """
+        self.level_surface_key = (id(level_data), get_level_grid(level_data).revision)
+        self.level_surface = None
+        self.lit_trap_tiles = []
+        if self.level_chunks is not None:
+            self.level_chunks.clear()
+            self.level_chunks = None
+
+        width = level_data["width"] * GameConfig.TILE_SIZE
+        height = level_data["height"] * GameConfig.TILE_SIZE
+        if width * height > GameConfig.LEVEL_SURFACE_MAX_PIXELS:
+            # 关卡太大，改为按需渲染摄像机附近的分块
+            self.level_chunks = LevelChunkCache(level_data, self.render_level_chunk)
+            return
+
+        self.level_surface, self.lit_trap_tiles = self.render_level_chunk(
+            (0, 0, level_data["width"], level_data["height"]), level_data)
+
+        # 点亮的陷阱瓦片按所在格子加入空间索引，只绘制屏幕内的
+        self.spatial_index.clear("lit_trap")
+        for entry in self.lit_trap_tiles:
+            tile_x, tile_y = entry[0]
+            self.spatial_index.insert("lit_trap", entry, tile_x // GameConfig.TILE_SIZE, tile_y // GameConfig.TILE_SIZE)
+
+    def build_spatial_index(self, level_data):
+        """把陷阱、道具和敌人加入空间索引"""
+        index = self.spatial_index
+        # 点亮的陷阱瓦片跟随关卡表面缓存，由 build_level_surface 维护
+        for kind in ("trap", "power_up", "enemy"):
+            index.clear(kind)
+        for trap in level_data["traps"]:
+            index.insert("trap", trap, trap[0], trap[1])
+        for power_up in self.power_ups:
+            index.insert("power_up", power_up, power_up.x, power_up.y)
+        for enemy in self.enemies:
+            index.move("enemy", enemy, enemy.x, enemy.y)
+
+    def get_render_bounds(self, level_data, camera=None):
+        """获取需要绘制实体的格子范围：屏幕范围向外多取一格，容纳超出瓦片的边框、标志和插值位移"""
+        start_x, start_y, end_x, end_y = self.get_screen_tile_bounds(level_data, camera)
+        return start_x - 1, start_y - 1, end_x + 1, end_y + 1
+
+    def render_level_chunk(self, bounds, terrain):
+        """把 bounds 范围内的静态地形画到一个新表面上，返回表面和点亮状态的陷阱瓦片"""
+        start_x, start_y, end_x, end_y = bounds
+        offset_x = -start_x * GameConfig.TILE_SIZE
+        offset_y = -start_y * GameConfig.TILE_SIZE
+
+        surface = pygame.Surface(((end_x - start_x) * GameConfig.TILE_SIZE, (end_y - start_y) * GameConfig.TILE_SIZE))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        self.draw_background(surface, offset_x, offset_y, bounds)
+        self.draw_terrain(surface, offset_x, offset_y, terrain, False)
+
+        # 点亮的陷阱瓦片，相邻的墙壁仍然画在陷阱上面；瓦片位置使用关卡像素坐标
+        lit_trap_tiles = []
+        for trap in terrain["traps"]:
+            tile_rect = pygame.Rect(trap[0] * GameConfig.TILE_SIZE, trap[1] * GameConfig.TILE_SIZE,
+                                    GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
+            local_rect = tile_rect.move(offset_x, offset_y)
+            if not surface.get_rect().contains(local_rect):
+                continue
+            tile = surface.subsurface(local_rect).copy()
+            self.draw_trap(tile, 0, 0, True)
+            walls = [wall for wall in terrain["walls"]
+                     if tile_rect.colliderect(wall[0] * GameConfig.TILE_SIZE, wall[1] * GameConfig.TILE_SIZE,
+                                              wall[2] * GameConfig.TILE_SIZE + 1, wall[3] * GameConfig.TILE_SIZE + 1)]
+            self.draw_walls(tile, -tile_rect.x, -tile_rect.y, walls)
+            lit_trap_tiles.append((tile_rect.topleft, tile))
+
+        return surface, lit_trap_tiles
+
+    def get_screen_tile_bounds(self, level_data, camera=None):
+        """获取屏幕上能看到的关卡格子范围，camera 默认为当前摄像机位置"""
+        camera_x, camera_y = camera if camera is not None else (self.camera_x, self.camera_y)
+        left = camera_x - GameConfig.GRID_OFFSET_X / GameConfig.TILE_SIZE
+        top = camera_y - (GameConfig.GRID_OFFSET_Y + GameConfig.UI_PANEL_HEIGHT) / GameConfig.TILE_SIZE
+        start_x = max(0, math.floor(left))
+        start_y = max(0, math.floor(top))
+        end_x = min(level_data["width"], math.ceil(left + self.view_width / GameConfig.TILE_SIZE))
+        end_y = min(level_data["height"], math.ceil(top + self.view_height / GameConfig.TILE_SIZE))
+        return start_x, start_y, end_x, end_y
+
+    def draw_background(self, surface, offset_x, offset_y, bounds):
         """绘制背景"""
-        # 计算可见区域
-        start_x = max(0, int(self.camera_x))
-        start_y = max(0, int(self.camera_y))
-        end_x = min(level_data["width"], int(self.camera_x) + 50)
-        end_y = min(level_data["height"], int(self.camera_y) + 50)
+        start_x, start_y, end_x, end_y = bounds
 
         # 绘制地面瓦片
         for y in range(start_y, end_y):
@@ -330,10 +671,10 @@ class GameEngine:
                     color = (50, 50, 50)
 
                 tile_rect = pygame.Rect(tile_x, tile_y, GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
-                pygame.draw.rect(self.screen, color, tile_rect)
+                pygame.draw.rect(surface, color, tile_rect)
 
-    def draw_terrain(self, offset_x, offset_y, level_data):
-        """绘制地形元素"""
+    def draw_terrain(self, surface, offset_x, offset_y, level_data, trap_lit):
+        """绘制沼泽、陷阱和墙壁"""
         # 绘制沼泽
         for swamp in level_data["swamps"]:
             x = swamp[0] * GameConfig.TILE_SIZE + offset_x
@@ -341,41 +682,48 @@ class GameEngine:
             swamp_rect = pygame.Rect(x, y, GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
 
             # 沼泽底色
-            pygame.draw.rect(self.screen, GameConfig.COLORS[GameConfig.ELEMENT_COLORS["SWAMP"]], swamp_rect)
+            pygame.draw.rect(surface, GameConfig.COLORS[GameConfig.ELEMENT_COLORS["SWAMP"]], swamp_rect)
 
             # 沼泽纹理
             for i in range(0, GameConfig.TILE_SIZE, 8):
                 for j in range(0, GameConfig.TILE_SIZE, 8):
                     if (i + j) % 16 == 0:
                         bubble_rect = pygame.Rect(x + i, y + j, 4, 4)
-                        pygame.draw.ellipse(self.screen, GameConfig.COLORS["DARK_GREEN"], bubble_rect)
+                        pygame.draw.ellipse(surface, GameConfig.COLORS["DARK_GREEN"], bubble_rect)
 
         # 绘制陷阱
         for trap in level_data["traps"]:
             x = trap[0] * GameConfig.TILE_SIZE + offset_x
             y = trap[1] * GameConfig.TILE_SIZE + offset_y
-            trap_rect = pygame.Rect(x, y, GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
-
-            # 陷阱动画
-            current_time = pygame.time.get_ticks()
-            if (current_time // 500) % 2:  # 每500ms闪烁
-                pygame.draw.rect(self.screen, GameConfig.COLORS[GameConfig.ELEMENT_COLORS["TRAP"]], trap_rect)
-            else:
-                pygame.draw.rect(self.screen, GameConfig.COLORS["DARK_GRAY"], trap_rect)
-
-            # 陷阱标志
-            center_x = x + GameConfig.TILE_SIZE // 2
-            center_y = y + GameConfig.TILE_SIZE // 2
-            points = [
-                (center_x, center_y - 8),
-                (center_x - 6, center_y + 6),
-                (center_x + 6, center_y + 6)
-            ]
-            pygame.draw.polygon(self.screen, GameConfig.COLORS["BLACK"], points)
-            pygame.draw.polygon(self.screen, GameConfig.COLORS["WHITE"], points, 2)
+            self.draw_trap(surface, x, y, trap_lit)
 
         # 绘制墙壁
-        for wall in level_data["walls"]:
+        self.draw_walls(surface, offset_x, offset_y, level_data["walls"])
+
+    def draw_trap(self, surface, x, y, lit):
+        """绘制一个陷阱"""
+        trap_rect = pygame.Rect(x, y, GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
+
+        # 陷阱动画
+        if lit:
+            pygame.draw.rect(surface, GameConfig.COLORS[GameConfig.ELEMENT_COLORS["TRAP"]], trap_rect)
+        else:
+            pygame.draw.rect(surface, GameConfig.COLORS["DARK_GRAY"], trap_rect)
+
+        # 陷阱标志
+        center_x = x + GameConfig.TILE_SIZE // 2
+        center_y = y + GameConfig.TILE_SIZE // 2
+        points = [
+            (center_x, center_y - 8),
+            (center_x - 6, center_y + 6),
+            (center_x + 6, center_y + 6)
+        ]
+        pygame.draw.polygon(surface, GameConfig.COLORS["BLACK"], points)
+        pygame.draw.polygon(surface, GameConfig.COLORS["WHITE"], points, 2)
+
+    def draw_walls(self, surface, offset_x, offset_y, walls):
+        """绘制墙壁"""
+        for wall in walls:
             x = wall[0] * GameConfig.TILE_SIZE + offset_x
             y = wall[1] * GameConfig.TILE_SIZE + offset_y
             w = wall[2] * GameConfig.TILE_SIZE
@@ -383,7 +731,7 @@ class GameEngine:
             wall_rect = pygame.Rect(x, y, w, h)
 
             # 墙壁主体
-            pygame.draw.rect(self.screen, GameConfig.COLORS[GameConfig.ELEMENT_COLORS["WALL"]], wall_rect)
+            pygame.draw.rect(surface, GameConfig.COLORS[GameConfig.ELEMENT_COLORS["WALL"]], wall_rect)
 
             # 墙壁纹理
             for i in range(0, w, GameConfig.TILE_SIZE):
@@ -392,13 +740,21 @@ class GameEngine:
                     brick_x = x + i
                     brick_y = y + j
                     brick_rect = pygame.Rect(brick_x, brick_y, GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
-                    pygame.draw.rect(self.screen, GameConfig.COLORS["DARK_GRAY"], brick_rect, 2)
+                    pygame.draw.rect(surface, GameConfig.COLORS["DARK_GRAY"], brick_rect, 2)
 
                     # 砖块接缝
-                    pygame.draw.line(self.screen, GameConfig.COLORS["BLACK"],
+                    pygame.draw.line(surface, GameConfig.COLORS["BLACK"],
                                      (brick_x, brick_y + GameConfig.TILE_SIZE // 2),
                                      (brick_x + GameConfig.TILE_SIZE, brick_y + GameConfig.TILE_SIZE // 2))
 
+    def draw_terrain_overlay(self, offset_x, offset_y, level_data, lit_trap_tiles):
+        """绘制每帧变化的地形元素：点亮的陷阱和脉动的终点"""
+        # 预渲染表面上的陷阱是熄灭状态，点亮时覆盖预渲染好的瓦片
+        base_x = math.floor(offset_x)
+        base_y = math.floor(offset_y)
+        for (tile_x, tile_y), tile in lit_trap_tiles:
+            self.screen.blit(tile, (base_x + tile_x, base_y + tile_y))
+
         # 绘制终点
         goal = level_data["goal"]
         x = goal[0] * GameConfig.TILE_SIZE + offset_x
@@ -424,20 +780,13 @@ class GameEngine:
 
     def draw_particles(self, offset_x, offset_y):
         """绘制粒子效果"""
-        for particle in self.particles:
-            x = int(particle["x"] + offset_x)
-            y = int(particle["y"] + offset_y)
-            size = max(1, int(particle["size"]))
-
-            # 根据生命周期调整透明度
-            alpha = int(255 * (particle["life"] / 1000))
-
-            # 创建带透明度的表面
-            particle_surface = pygame.Surface((size * 2, size * 2))
-            particle_surface.set_alpha(alpha)
-            particle_surface.fill(particle["color"])
+        rects = self.particles.draw(self.screen, offset_x, offset_y)
+        if self.dirty_rects is not None:
+            self.dirty_rects.extend(rects)
 
-            self.screen.blit(particle_surface, (x - size, y - size))
+    def get_ai_tier_counts(self):
+        """获取各LOD层的敌人数量，供性能分析使用"""
+        return list(self.ai_scheduler.tier_counts)
 
     def get_visible_bounds(self):
         """获取可见区域边界"""
@@ -445,9 +794,9 @@ class GameEngine:
         if not level_data:
             return 0, 0, 0, 0
 
-        view_width = (self.screen.get_width() - GameConfig.GRID_OFFSET_X * 2) // GameConfig.TILE_SIZE
+        view_width = (self.view_width - GameConfig.GRID_OFFSET_X * 2) // GameConfig.TILE_SIZE
         view_height = (
-                                  self.screen.get_height() - GameConfig.GRID_OFFSET_Y * 2 - GameConfig.UI_PANEL_HEIGHT) // GameConfig.TILE_SIZE
+                                  self.view_height - GameConfig.GRID_OFFSET_Y * 2 - GameConfig.UI_PANEL_HEIGHT) // GameConfig.TILE_SIZE
 
         start_x = max(0, int(self.camera_x))
         start_y = max(0, int(self.camera_y))
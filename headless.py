@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无界面模拟
+不创建窗口、不绘制画面，用脚本化的输入驱动 GameEngine，尽可能快地执行固定步长的模拟，
+用于在没有显示器的服务器上做数值平衡和回归测试
+
+用法: python headless.py [--levels 1 2 3] [--ticks N] [--seed N] [--hold-ticks N]
+"""
+
+import argparse
+import random
+import time
+import pygame
+from config import GameConfig
+from game_engine import GameEngine
+from level_manager import LevelManager
+
+
+class KeyState:
+    """按键状态，接口与 pygame.key.get_pressed() 的返回值相同"""
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class RandomInput:
+    """随机游走的输入来源：每隔 hold_ticks 个模拟步随机换一个方向（或停下）"""
+
+    DIRECTIONS = ((), (pygame.K_UP,), (pygame.K_DOWN,), (pygame.K_LEFT,), (pygame.K_RIGHT,),
+                  (pygame.K_UP, pygame.K_LEFT), (pygame.K_UP, pygame.K_RIGHT),
+                  (pygame.K_DOWN, pygame.K_LEFT), (pygame.K_DOWN, pygame.K_RIGHT))
+
+    def __init__(self, seed=0, hold_ticks=30):
+        """初始化输入来源，相同的种子产生相同的输入序列"""
+        self.rng = random.Random(seed)
+        self.hold_ticks = hold_ticks
+        self.states = [KeyState(keys) for keys in self.DIRECTIONS]
+        self.current = self.states[0]
+        self.remaining = 0
+
+    def __call__(self):
+        """返回当前模拟步的按键状态"""
+        if self.remaining <= 0:
+            self.current = self.rng.choice(self.states)
+            self.remaining = self.hold_ticks
+        self.remaining -= 1
+        return self.current
+
+
+class HeadlessSimulation:
+    """无界面模拟器，一个实例可以依次运行多个关卡"""
+
+    def __init__(self, level_manager=None):
+        """初始化模拟器"""
+        self.level_manager = level_manager or LevelManager()
+        self.engine = GameEngine(None, self.level_manager, None)
+
+        # 已加载的关卡 {关卡编号: 关卡数据}，重复模拟同一关卡时不再读取文件
+        self.levels = {}
+
+    def load_level(self, level_num):
+        """加载关卡，每个关卡只从文件读取一次"""
+        level_data = self.levels.get(level_num)
+        if level_data is None:
+            if not self.level_manager.load_level(level_num):
+                return False
+            self.levels[level_num] = self.level_manager.current_level
+        else:
+            self.level_manager.current_level = level_data
+            self.level_manager.current_level_num = level_num
+        return True
+
+    def run_level(self, level_num, max_ticks, input_source):
+        """运行一个关卡直到胜利、失败或达到 max_ticks 个模拟步，返回统计结果"""
+        if not self.load_level(level_num):
+            return None
+
+        engine = self.engine
+        engine.input_source = input_source
+        engine.reset()
+
+        dt = 1000 / GameConfig.SIMULATION_RATE
+        result = "PLAYING"
+        ticks = 0
+        begin = time.perf_counter()
+        while ticks < max_ticks:
+            result = engine.update(dt)
+            ticks += 1
+            if result != "PLAYING":
+                break
+        elapsed = time.perf_counter() - begin
+
+        player = engine.player
+        return {
+            "level": level_num,
+            "name": self.level_manager.get_level_name(),
+            "result": result if result != "PLAYING" else "TIMEOUT",
+            "ticks": ticks,
+            "game_time": round(engine.game_time, 3),
+            "score": player.score,
+            "lives": player.lives,
+            "deaths": GameConfig.PLAYER_LIVES - player.lives,
+            "elapsed": elapsed,
+            "ticks_per_sec": ticks / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def shutdown(self):
+        """释放后台资源"""
+        self.engine.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面运行游戏模拟")
+    parser.add_argument("--levels", type=int, nargs="+", default=None, help="要模拟的关卡编号，默认为已有的全部关卡")
+    parser.add_argument("--ticks", type=int, default=GameConfig.SIMULATION_RATE * 600, help="每个关卡最多模拟的步数")
+    parser.add_argument("--seed", type=int, default=1, help="随机输入的种子")
+    parser.add_argument("--hold-ticks", type=int, default=30, help="随机输入每个方向保持的模拟步数")
+    args = parser.parse_args()
+
+    simulation = HeadlessSimulation()
+    levels = args.levels
+    if levels is None:
+        levels = sorted(int(path.stem[len("level"):]) for path in simulation.level_manager.levels_dir.glob("level*.json")
+                        if path.stem[len("level"):].isdigit())
+
+    print(f"{'关卡':<20}{'结果':<10}{'步数':>10}{'分数':>8}{'生命':>6}{'步/秒':>12}")
+    total_ticks = 0
+    total_elapsed = 0.0
+    try:
+        for level_num in levels:
+            stats = simulation.run_level(level_num, args.ticks, RandomInput(args.seed + level_num, args.hold_ticks))
+            if stats is None:
+                continue
+            total_ticks += stats["ticks"]
+            total_elapsed += stats["elapsed"]
+            print(f"{stats['name']:<20}{stats['result']:<10}{stats['ticks']:>10}{stats['score']:>8}"
+                  f"{stats['lives']:>6}{stats['ticks_per_sec']:>12.0f}")
+    finally:
+        simulation.shutdown()
+
+    if total_elapsed > 0:
+        print(f"共 {total_ticks} 步，耗时 {total_elapsed:.2f} 秒，平均 {total_ticks / total_elapsed:.0f} 步/秒")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
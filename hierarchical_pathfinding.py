@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分层寻路 (HPA*)
+把大地图切分成固定大小的区块，在区块边界的入口之间建立抽象图，
+先在抽象图上搜索，再只细化需要用到的局部路段
+"""
+
+import heapq
+from array import array
+from collections import deque
+from config import GameConfig
+from pathfinding import AStarPathfinder, DIRECTIONS
+from numpy_support import np  # 没有安装 NumPy 时逐个节点做区块内的BFS
+
+
+# 入口长度达到该值时在两端各放一个过渡点，否则只在中间放一个
+ENTRANCE_SPLIT_LENGTH = 6
+
+# 向量化计算区块内距离时每批处理的抽象节点数
+INTRA_EDGE_BATCH = 2048
+
+# 抽象搜索中起点和终点使用的临时节点编号
+START_NODE = -1
+GOAL_NODE = -2
+
+
+class HierarchicalPathfinder:
+    """分层寻路器
+    入口图和区块内部各入口之间的距离都在构建时一次性生成，查询时不再做区块内的BFS
+    """
+
+    def __init__(self, grid, cluster_size=None):
+        """根据关卡网格构建抽象入口图"""
+        if cluster_size is None:
+            cluster_size = GameConfig.HPA_CLUSTER_SIZE
+        self.grid = grid
+        self.revision = grid.revision
+        self.cluster_size = cluster_size
+        self.clusters_x = (grid.width + cluster_size - 1) // cluster_size
+        self.clusters_y = (grid.height + cluster_size - 1) // cluster_size
+
+        # 抽象节点
+        self.nodes = []  # 节点编号 -> 格子坐标
+        self.node_ids = {}  # 格子坐标 -> 节点编号
+        self.cluster_nodes = [[] for _ in range(self.clusters_x * self.clusters_y)]
+
+        # 跨区块的边 {节点: [(相邻节点, 代价), ...]}
+        self.inter_edges = {}
+        # 区块内部的边，每个区块一个 {节点: [(相邻节点, 代价), ...]}
+        self.intra_edges = [{} for _ in range(self.clusters_x * self.clusters_y)]
+
+        # 区块内的局部A*
+        self.local_astar = AStarPathfinder()
+
+        self.build_entrances()
+
+    def cluster_index(self, x, y):
+        """获取格子所在区块的编号"""
+        return (y // self.cluster_size) * self.clusters_x + x // self.cluster_size
+
+    def cluster_bounds(self, index):
+        """获取区块的格子范围 (x0, y0, x1, y1)，右下边界不包含"""
+        size = self.cluster_size
+        x0 = (index % self.clusters_x) * size
+        y0 = (index // self.clusters_x) * size
+        return x0, y0, min(x0 + size, self.grid.width), min(y0 + size, self.grid.height)
+
+    def get_node(self, cell):
+        """获取格子对应的抽象节点，不存在时创建"""
+        node = self.node_ids.get(cell)
+        if node is None:
+            node = len(self.nodes)
+            self.nodes.append(cell)
+            self.node_ids[cell] = node
+            self.cluster_nodes[self.cluster_index(cell[0], cell[1])].append(node)
+        return node
+
+    def add_transition(self, cell_a, cell_b):
+        """在相邻区块的两个格子之间添加过渡边"""
+        node_a = self.get_node(cell_a)
+        node_b = self.get_node(cell_b)
+        self.inter_edges.setdefault(node_a, []).append((node_b, 1))
+        self.inter_edges.setdefault(node_b, []).append((node_a, 1))
+
+    def build_entrances(self):
+        """扫描所有区块边界，找出入口并放置过渡点"""
+        grid = self.grid
+        size = self.cluster_size
+
+        # 竖直边界：左侧区块最右一列与右侧区块最左一列
+        for x in range(size - 1, grid.width - 1, size):
+            for y0 in range(0, grid.height, size):
+                y1 = min(y0 + size, grid.height)
+                self.add_entrances([((x, y), (x + 1, y)) for y in range(y0, y1)])
+
+        # 水平边界：上方区块最下一行与下方区块最上一行
+        for y in range(size - 1, grid.height - 1, size):
+            for x0 in range(0, grid.width, size):
+                x1 = min(x0 + size, grid.width)
+                self.add_entrances([((x, y), (x, y + 1)) for x in range(x0, x1)])
+
+        # 所有入口放置完毕后计算每个区块内部的边
+        self.build_intra_edges()
+
+    def add_entrances(self, border):
+        """把一段边界上两侧都可通行的连续格子划分成入口"""
+        blocked = self.grid.is_blocked
+        run = []
+        # 末尾追加一个哨兵，保证最后一段入口也会被处理
+        for pair in border + [None]:
+            if pair is not None and not blocked(*pair[0]) and not blocked(*pair[1]):
+                run.append(pair)
+                continue
+            if run:
+                if len(run) < ENTRANCE_SPLIT_LENGTH:
+                    self.add_transition(*run[len(run) // 2])
+                else:
+                    self.add_transition(*run[0])
+                    self.add_transition(*run[-1])
+                run = []
+
+    def local_distances(self, source, bounds):
+        """在区块范围内从源格子做BFS，返回 {格子: 步数}"""
+        x0, y0, x1, y1 = bounds
+        width = x1 - x0
+        blocked = self.grid.blocked
+        grid_width = self.grid.width
+
+        distances = array("i", [-1]) * (width * (y1 - y0))
+        distances[(source[1] - y0) * width + source[0] - x0] = 0
+        queue = deque([source])
+        while queue:
+            x, y = queue.popleft()
+            next_distance = distances[(y - y0) * width + x - x0] + 1
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if nx < x0 or ny < y0 or nx >= x1 or ny >= y1 or blocked[ny * grid_width + nx]:
+                    continue
+                index = (ny - y0) * width + nx - x0
+                if distances[index] < 0:
+                    distances[index] = next_distance
+                    queue.append((nx, ny))
+        return distances
+
+    def links_from(self, cell, cluster):
+        """计算格子到所在区块内各抽象节点的代价"""
+        bounds = self.cluster_bounds(cluster)
+        x0, y0, x1, _ = bounds
+        distances = self.local_distances(cell, bounds)
+        links = []
+        for node in self.cluster_nodes[cluster]:
+            node_x, node_y = self.nodes[node]
+            distance = distances[(node_y - y0) * (x1 - x0) + node_x - x0]
+            if distance > 0:
+                links.append((node, distance))
+        return links
+
+    def build_intra_edges(self):
+        """计算每个区块内部各抽象节点之间的边"""
+        if np is not None and self.nodes:
+            self.build_intra_edges_numpy()
+            return
+
+        for cluster, nodes in enumerate(self.cluster_nodes):
+            edges = self.intra_edges[cluster]
+            for node in nodes:
+                edges[node] = self.links_from(self.nodes[node], cluster)
+
+    def build_intra_edges_numpy(self):
+        """用 NumPy 同时对一批抽象节点做区块内的BFS，结果与 links_from 相同"""
+        grid = self.grid
+        size = self.cluster_size
+
+        # 把关卡切成 (区块, 行, 列) 的可通行掩码，越出关卡的部分视为墙
+        blocked = np.ones((self.clusters_y * size, self.clusters_x * size), dtype=bool)
+        blocked[:grid.height, :grid.width] = np.frombuffer(
+            bytes(grid.blocked), dtype=np.uint8).reshape(grid.height, grid.width) != 0
+        passable_blocks = ~blocked.reshape(self.clusters_y, size, self.clusters_x, size).transpose(
+            0, 2, 1, 3).reshape(-1, size, size)
+
+        cells = np.array(self.nodes, dtype=np.int64)
+        clusters = (cells[:, 1] // size) * self.clusters_x + cells[:, 0] // size
+        local_x = cells[:, 0] % size
+        local_y = cells[:, 1] % size
+
+        for begin in range(0, len(self.nodes), INTRA_EDGE_BATCH):
+            end = min(begin + INTRA_EDGE_BATCH, len(self.nodes))
+            rows = np.arange(end - begin)
+            passable = passable_blocks[clusters[begin:end]]
+            frontier = np.zeros_like(passable)
+            frontier[rows, local_y[begin:end], local_x[begin:end]] = True
+            reached = frontier.copy()
+            distances = np.empty(passable.shape, dtype=np.int32)
+
+            # 逐层向四个方向扩展，所有节点的BFS同步进行。每一层之前给尚未到达的格子计数加一，
+            # 到达时的计数就是步数；已经结束的BFS写出结果并从批次中移除
+            steps = np.zeros(passable.shape, dtype=np.int16)
+            while len(rows):
+                steps += ~reached
+                grown = np.zeros_like(frontier)
+                grown[:, 1:, :] |= frontier[:, :-1, :]
+                grown[:, :-1, :] |= frontier[:, 1:, :]
+                grown[:, :, 1:] |= frontier[:, :, :-1]
+                grown[:, :, :-1] |= frontier[:, :, 1:]
+                grown &= passable
+                grown &= ~reached
+                reached |= grown
+                frontier = grown
+
+                alive = frontier.any(axis=(1, 2))
+                if not alive.all():
+                    finished = ~alive
+                    distances[rows[finished]] = np.where(reached[finished], steps[finished], -1)
+                    rows = rows[alive]
+                    frontier = frontier[alive]
+                    reached = reached[alive]
+                    passable = passable[alive]
+                    steps = steps[alive]
+
+            for node in range(begin, end):
+                cluster = int(clusters[node])
+                others = self.cluster_nodes[cluster]
+                node_distances = distances[node - begin, local_y[others], local_x[others]].tolist()
+                self.intra_edges[cluster][node] = [(other, distance)
+                                                   for other, distance in zip(others, node_distances) if distance > 0]
+
+    def neighbors(self, node, start_links, goal_links):
+        """获取抽象节点的全部邻居"""
+        if node == START_NODE:
+            return start_links
+
+        cell = self.nodes[node]
+        result = list(self.inter_edges.get(node, ()))
+        result.extend(self.intra_edges[self.cluster_index(cell[0], cell[1])][node])
+        cost = goal_links.get(node)
+        if cost is not None:
+            result.append((GOAL_NODE, cost))
+        return result
+
+    def find_abstract_path(self, start, goal):
+        """在抽象图上搜索，返回经过的格子序列（含起点和终点）"""
+        start_cluster = self.cluster_index(start[0], start[1])
+        goal_cluster = self.cluster_index(goal[0], goal[1])
+        start_links = self.links_from(start, start_cluster)
+        goal_links = dict(self.links_from(goal, goal_cluster))
+
+        # 起点或终点本身就是抽象节点时，用代价为0的边连接
+        start_node = self.node_ids.get(start)
+        if start_node is not None:
+            start_links.append((start_node, 0))
+        goal_node = self.node_ids.get(goal)
+        if goal_node is not None:
+            goal_links[goal_node] = 0
+
+        def heuristic(node):
+            if node == GOAL_NODE:
+                return 0
+            x, y = start if node == START_NODE else self.nodes[node]
+            return abs(goal[0] - x) + abs(goal[1] - y)
+
+        g_score = {START_NODE: 0}
+        parent = {START_NODE: None}
+        closed = set()
+        open_heap = [(heuristic(START_NODE), START_NODE)]
+
+        while open_heap:
+            _, node = heapq.heappop(open_heap)
+            if node in closed:
+                continue
+            closed.add(node)
+
+            if node == GOAL_NODE:
+                cells = []
+                while node is not None:
+                    cells.append(goal if node == GOAL_NODE else start if node == START_NODE else self.nodes[node])
+                    node = parent[node]
+                cells.reverse()
+                return cells
+
+            for neighbor, cost in self.neighbors(node, start_links, goal_links):
+                next_g = g_score[node] + cost
+                if neighbor in closed or next_g >= g_score.get(neighbor, next_g + 1):
+                    continue
+                g_score[neighbor] = next_g
+                parent[neighbor] = node
+                heapq.heappush(open_heap, (next_g + heuristic(neighbor), neighbor))
+
+        return []
+
+    def find_path(self, start, goal, max_segments=None):
+        """寻找从起点到终点的路径
+
+        max_segments 限制细化的抽象路段数，超出部分不展开，返回的路径只覆盖前面几段
+        """
+        grid = self.grid
+        if start == goal:
+            return [start]
+        if grid.is_blocked(goal[0], goal[1]):
+            return []
+
+        # 同一区块内先尝试局部搜索
+        start_cluster = self.cluster_index(start[0], start[1])
+        if start_cluster == self.cluster_index(goal[0], goal[1]):
+            path = self.local_astar.find_path(grid, start, goal, self.cluster_bounds(start_cluster))
+            if path:
+                return path
+
+        waypoints = self.find_abstract_path(start, goal)
+        if not waypoints:
+            return []
+
+        # 细化路段
+        path = [start]
+        segments = 0
+        for cell_a, cell_b in zip(waypoints, waypoints[1:]):
+            if cell_a == cell_b:
+                continue
+            if max_segments is not None and segments >= max_segments:
+                break
+            segments += 1
+
+            if abs(cell_a[0] - cell_b[0]) + abs(cell_a[1] - cell_b[1]) == 1:
+                # 跨区块的过渡边
+                path.append(cell_b)
+                continue
+
+            bounds = self.cluster_bounds(self.cluster_index(cell_a[0], cell_a[1]))
+            segment = self.local_astar.find_path(grid, cell_a, cell_b, bounds)
+            if not segment:
+                break
+            path.extend(segment[1:])
+
+        return path
+
+
+# 当前关卡的分层寻路器，墙壁变化后重新构建
+_hierarchy = None
+
+
+def get_hierarchy(grid):
+    """获取关卡网格对应的分层寻路器"""
+    global _hierarchy
+    if _hierarchy is None or _hierarchy.grid is not grid or _hierarchy.revision != grid.revision:
+        _hierarchy = HierarchicalPathfinder(grid)
+    return _hierarchy
\ No newline at end of file
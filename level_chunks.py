@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关卡分块渲染缓存
+超大关卡无法整张预渲染，把地图切成固定大小的分块，按需渲染到各自的表面上，
+只在内存中保留摄像机附近最近使用的分块
+"""
+
+from collections import OrderedDict
+from config import GameConfig
+
+
+class LevelChunkCache:
+    """关卡分块缓存
+    render_chunk(bounds, terrain) 负责把 bounds=(x0, y0, x1, y1) 范围内的地形画成一个分块，
+    terrain 只包含与该分块相交的沼泽、陷阱和墙壁；分块按最近最少使用淘汰
+    """
+
+    def __init__(self, level_data, render_chunk, chunk_size=None, max_chunks=None):
+        """初始化分块缓存"""
+        if chunk_size is None:
+            chunk_size = GameConfig.LEVEL_CHUNK_SIZE
+        if max_chunks is None:
+            max_chunks = GameConfig.LEVEL_CHUNK_CACHE_SIZE
+        self.width = level_data["width"]
+        self.height = level_data["height"]
+        self.render_chunk = render_chunk
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+        self.terrain = self.bucket_terrain(level_data)
+
+        # 统计信息
+        self.rendered = 0
+        self.evicted = 0
+
+    def bucket_terrain(self, level_data):
+        """把地形元素分配到它们覆盖的分块"""
+        size = self.chunk_size
+        terrain = {}
+
+        def bucket(key):
+            if key not in terrain:
+                terrain[key] = {"swamps": [], "traps": [], "walls": []}
+            return terrain[key]
+
+        for name in ("swamps", "traps"):
+            for tile in level_data[name]:
+                bucket((tile[0] // size, tile[1] // size))[name].append(tile)
+
+        # 墙壁的纹理线条会画到右下方相邻格子的第一个像素，多算一格
+        for wall in level_data["walls"]:
+            for chunk_y in range(wall[1] // size, (wall[1] + wall[3]) // size + 1):
+                for chunk_x in range(wall[0] // size, (wall[0] + wall[2]) // size + 1):
+                    bucket((chunk_x, chunk_y))["walls"].append(wall)
+        return terrain
+
+    def chunk_range(self, bounds, margin=0):
+        """获取覆盖格子范围 bounds 的分块坐标"""
+        start_x, start_y, end_x, end_y = bounds
+        size = self.chunk_size
+        first_x = max(0, start_x // size - margin)
+        first_y = max(0, start_y // size - margin)
+        last_x = min((self.width - 1) // size, (end_x - 1) // size + margin)
+        last_y = min((self.height - 1) // size, (end_y - 1) // size + margin)
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                yield chunk_x, chunk_y
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """获取分块，不在缓存中时立即渲染"""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        size = self.chunk_size
+        bounds = (chunk_x * size, chunk_y * size,
+                  min(self.width, (chunk_x + 1) * size), min(self.height, (chunk_y + 1) * size))
+        empty = {"swamps": [], "traps": [], "walls": []}
+        chunk = self.render_chunk(bounds, self.terrain.get(key, empty))
+        self.rendered += 1
+
+        self.chunks[key] = chunk
+        while len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+            self.evicted += 1
+        return chunk
+
+    def prefetch(self, bounds, margin=None, limit=None):
+        """提前渲染 bounds 四周的分块，每次最多渲染 limit 个，避免单帧卡顿"""
+        if margin is None:
+            margin = GameConfig.LEVEL_CHUNK_PREFETCH_MARGIN
+        if limit is None:
+            limit = GameConfig.LEVEL_CHUNK_PREFETCH_PER_FRAME
+
+        for key in self.chunk_range(bounds, margin):
+            if key in self.chunks:
+                continue
+            if limit <= 0:
+                return
+            self.get_chunk(*key)
+            limit -= 1
+
+    def clear(self):
+        """释放所有分块"""
+        self.chunks.clear()
\ No newline at end of file
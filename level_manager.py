@@ -8,8 +8,224 @@
 import json
 import random
 import os
+import itertools
+from collections import deque
 from pathlib import Path
 from config import GameConfig
+from hierarchical_pathfinding import get_hierarchy
+from pathfinding import get_backend_name
+from numpy_support import np  # 没有安装 NumPy 时距离图退回纯Python的BFS
+
+# 地形类型标志位（同一格子可以同时有多种地形）
+TILE_SWAMP = 1
+TILE_TRAP = 2
+TILE_GOAL = 4
+
+# 全局递增的墙壁版本号，不同关卡、同一关卡的不同墙壁布局都不会重复
+_revision_counter = itertools.count(1)
+
+
+class LevelGrid:
+    """关卡占用网格
+    在关卡加载时由墙壁矩形一次性构建，之后的碰撞检测只需查询数组
+    同时维护地形类型索引和按格子索引的道具表
+    """
+
+    def __init__(self, level_data):
+        """根据关卡数据构建网格"""
+        self.width = level_data["width"]
+        self.height = level_data["height"]
+
+        # 每个格子一个字节，非0表示墙壁
+        self.blocked = bytearray(self.width * self.height)
+        self.rebuild_walls(level_data["walls"])
+
+        # 地形类型索引
+        self.tiles = bytearray(self.width * self.height)
+        for swamp in level_data["swamps"]:
+            self.mark_tile(swamp[0], swamp[1], TILE_SWAMP)
+        for trap in level_data["traps"]:
+            self.mark_tile(trap[0], trap[1], TILE_TRAP)
+        goal = level_data["goal"]
+        self.mark_tile(goal[0], goal[1], TILE_GOAL)
+
+        # 道具索引 {(x, y): [道具, ...]}，由游戏引擎在生成道具时填充
+        self.power_ups = {}
+
+    @classmethod
+    def from_occupancy(cls, width, height, blocked, revision):
+        """直接由占用数据构建网格（后台寻路进程使用，不含地形信息）"""
+        grid = cls({"width": width, "height": height, "walls": [], "swamps": [], "traps": [], "goal": [-1, -1]})
+        grid.blocked[:] = blocked
+        grid.revision = revision
+        return grid
+
+    def rebuild_walls(self, walls):
+        """根据墙壁列表重建占用网格"""
+        self.blocked[:] = bytes(self.width * self.height)
+        for wall in walls:
+            self.fill_rect(wall, 1)
+        self.revision = next(_revision_counter)
+
+    def add_wall(self, rect):
+        """在占用网格上增加一面墙"""
+        self.fill_rect(rect, 1)
+        self.revision = next(_revision_counter)
+
+    def fill_rect(self, rect, value):
+        """把矩形区域（网格坐标 x, y, w, h）写入占用网格"""
+        x0 = max(0, rect[0])
+        y0 = max(0, rect[1])
+        x1 = min(self.width, rect[0] + rect[2])
+        y1 = min(self.height, rect[1] + rect[3])
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        row = bytes([value]) * (x1 - x0)
+        for y in range(y0, y1):
+            start = y * self.width + x0
+            self.blocked[start:start + x1 - x0] = row
+
+    def mark_tile(self, x, y, flag):
+        """给格子加上地形标志"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.tiles[y * self.width + x] |= flag
+
+    def get_tile(self, x, y):
+        """获取格子的地形标志（越界返回0）"""
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return 0
+        return self.tiles[int(y) * self.width + int(x)]
+
+    def index_power_ups(self, power_ups):
+        """按格子重建道具索引，跳过已收集的道具"""
+        self.power_ups = {}
+        for power_up in power_ups:
+            if not power_up.collected:
+                self.power_ups.setdefault((power_up.x, power_up.y), []).append(power_up)
+
+    def take_power_ups(self, x, y):
+        """取出格子上的全部道具并从索引中移除"""
+        return self.power_ups.pop((x, y), [])
+
+    def get_hierarchy(self):
+        """获取网格的分层寻路器，墙壁变化后重新构建"""
+        return get_hierarchy(self)
+
+    def is_blocked(self, x, y):
+        """检查坐标所在格子是否被阻挡（越界视为阻挡）"""
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return True
+        return self.blocked[int(y) * self.width + int(x)] != 0
+
+    def is_area_blocked(self, x, y):
+        """检查左上角在 (x, y) 的一个瓦片大小区域是否与墙壁重叠
+
+        与按像素矩形做 colliderect 的结果一致：区域最多跨越 2x2 个格子
+        """
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return True
+
+        tile = GameConfig.TILE_SIZE
+        pixel_x = int(x * tile)
+        pixel_y = int(y * tile)
+        x0 = pixel_x // tile
+        y0 = pixel_y // tile
+        # 超出地图的部分没有墙壁
+        x1 = min((pixel_x + tile - 1) // tile, self.width - 1)
+        y1 = min((pixel_y + tile - 1) // tile, self.height - 1)
+
+        blocked = self.blocked
+        for cell_y in range(y0, y1 + 1):
+            row = cell_y * self.width
+            for cell_x in range(x0, x1 + 1):
+                if blocked[row + cell_x]:
+                    return True
+        return False
+
+
+def get_level_grid(level_data):
+    """获取关卡的占用网格，没有时现场构建并缓存到关卡数据中"""
+    grid = level_data.get("_grid")
+    if grid is None:
+        grid = LevelGrid(level_data)
+        level_data["_grid"] = grid
+    return grid
+
+
+def compute_distance_map(grid, source, max_distance=None):
+    """计算从源格子出发到所有格子的步数（四方向），返回按 [y][x] 索引的距离图，-1 表示不可达
+
+    安装了 NumPy 时使用向量化的波前扩展：每一轮用索引平移一次扩展整个波前，
+    再用可通行掩码过滤，返回 int32 的二维数组；否则返回由 array 行组成的列表
+    """
+    if np is None:
+        return _distance_map_python(grid, source, max_distance)
+
+    width = grid.width
+    height = grid.height
+    # 四周加一圈墙，平移时不需要做边界判断
+    stride = width + 2
+    unvisited = np.zeros((height + 2) * stride, dtype=bool)
+    unvisited.reshape(height + 2, stride)[1:-1, 1:-1] = (
+        np.frombuffer(grid.blocked, dtype=np.uint8).reshape(height, width) == 0)
+    distances = np.full(unvisited.shape, -1, dtype=np.int32)
+    result = distances.reshape(height + 2, stride)[1:-1, 1:-1]
+
+    source_x, source_y = source
+    if grid.is_blocked(source_x, source_y):
+        return np.ascontiguousarray(result)
+
+    start = (source_y + 1) * stride + source_x + 1
+    unvisited[start] = False
+    distances[start] = 0
+
+    offsets = np.array([1, -1, stride, -stride], dtype=np.int64)
+    # 用于去重的标记数组
+    marker = np.zeros(unvisited.shape, dtype=np.int32)
+    frontier = np.array([start], dtype=np.int64)
+    distance = 0
+
+    while frontier.size and (max_distance is None or distance < max_distance):
+        distance += 1
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidates = candidates[unvisited[candidates]]
+        if not candidates.size:
+            break
+
+        # 同一格子可能被多个波前格子扩展到，只保留最后写入标记的那一个
+        order = np.arange(candidates.size)
+        marker[candidates] = order
+        candidates = candidates[marker[candidates] == order]
+
+        unvisited[candidates] = False
+        distances[candidates] = distance
+        frontier = candidates
+
+    return np.ascontiguousarray(result)
+
+
+def _distance_map_python(grid, source, max_distance=None):
+    """没有 NumPy 时的BFS实现"""
+    from array import array
+
+    distances = [array("i", [-1]) * grid.width for _ in range(grid.height)]
+    source_x, source_y = source
+    if grid.is_blocked(source_x, source_y):
+        return distances
+
+    distances[source_y][source_x] = 0
+    queue = deque([source])
+    while queue:
+        x, y = queue.popleft()
+        next_distance = distances[y][x] + 1
+        if max_distance is not None and next_distance > max_distance:
+            continue
+        for nx, ny in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+            if not grid.is_blocked(nx, ny) and distances[ny][nx] < 0:
+                distances[ny][nx] = next_distance
+                queue.append((nx, ny))
+    return distances
 
 
 class LevelManager:
@@ -30,6 +246,7 @@ class LevelManager:
             try:
                 with open(level_file, "r", encoding="utf-8") as f:
                     self.current_level = json.load(f)
+                    self.build_level_grid(self.current_level)
                     self.current_level_num = level_num
                     return True
             except Exception as e:
@@ -46,12 +263,22 @@ class LevelManager:
     def save_level(self, level_num, level_data):
         """保存关卡数据"""
         level_file = self.levels_dir / f"level{level_num}.json"
+        # 以下划线开头的是运行时数据（如占用网格），不写入文件
+        saved_data = {key: value for key, value in level_data.items() if not key.startswith("_")}
         try:
             with open(level_file, "w", encoding="utf-8") as f:
-                json.dump(level_data, f, indent=2, ensure_ascii=False)
+                json.dump(saved_data, f, indent=2, ensure_ascii=False)
         except Exception as e:
             print(f"保存关卡 {level_num} 失败: {e}")
 
+    def build_level_grid(self, level_data):
+        """构建关卡的占用网格，大地图同时预先构建分层寻路的入口图"""
+        grid = LevelGrid(level_data)
+        level_data["_grid"] = grid
+        if get_backend_name(grid) == "hpa":
+            grid.get_hierarchy()
+        return grid
+
     def has_next_level(self, current_level_num):
         """检查是否有下一关"""
         next_level_file = self.levels_dir / f"level{current_level_num + 1}.json"
@@ -95,6 +322,9 @@ class LevelManager:
         # 生成道具
         level_data["power_ups"] = self.generate_power_ups(width, height, level_num)
 
+        # 构建占用网格
+        self.build_level_grid(level_data)
+
         return level_data
 
     def generate_border_walls(self, width, height):
@@ -243,17 +473,21 @@ class LevelManager:
 
     def is_position_blocked(self, x, y, level_data):
         """检查位置是否被阻挡"""
-        # 检查边界
-        if x < 0 or y < 0 or x >= level_data["width"] or y >= level_data["height"]:
-            return True
-
-        # 检查墙壁
-        for wall in level_data["walls"]:
-            if (wall[0] <= x < wall[0] + wall[2] and
-                    wall[1] <= y < wall[1] + wall[3]):
-                return True
-
-        return False
+        return get_level_grid(level_data).is_blocked(x, y)
+
+    def add_wall(self, rect):
+        """向当前关卡添加墙壁，同时更新占用网格"""
+        if not self.current_level:
+            return
+        self.current_level["walls"].append(list(rect))
+        get_level_grid(self.current_level).add_wall(rect)
+
+    def remove_wall(self, rect):
+        """从当前关卡移除墙壁，同时重建占用网格"""
+        if not self.current_level or list(rect) not in self.current_level["walls"]:
+            return
+        self.current_level["walls"].remove(list(rect))
+        get_level_grid(self.current_level).rebuild_walls(self.current_level["walls"])
 
     def get_current_level(self):
         """获取当前关卡数据"""
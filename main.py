@@ -14,6 +14,7 @@ from game_engine import GameEngine
 from level_manager import LevelManager
 from ui_manager import UIManager
 from config import GameConfig
+from frame_profiler import frame_profiler
 
 
 class MazeGame:
@@ -29,6 +30,11 @@ class MazeGame:
         # 游戏时钟
         self.clock = pygame.time.Clock()
 
+        # 固定步长模拟：累积真实经过的时间，每满一个步长执行一次模拟
+        self.last_update_ticks = pygame.time.get_ticks()
+        self.accumulator = 0
+        self.render_alpha = 1.0  # 两次模拟步之间的插值系数
+
         # 初始化各个管理器
         self.level_manager = LevelManager()
         self.ui_manager = UIManager(self.screen)
@@ -38,6 +44,12 @@ class MazeGame:
         self.running = True
         self.game_state = "MENU"  # MENU, PLAYING, PAUSED, GAME_OVER, VICTORY
 
+        # 上一帧送到显示器时的游戏状态，状态切换后整屏刷新
+        self.presented_state = None
+
+        # 逐帧性能分析
+        frame_profiler.set_enabled(GameConfig.PROFILER_ENABLED)
+
         # 加载资源
         self.load_resources()
 
@@ -122,6 +134,20 @@ class MazeGame:
             if event.type == pygame.QUIT:
                 self.running = False
 
+            elif event.type == pygame.VIDEOEXPOSE:
+                # 窗口需要重绘，下一帧整屏刷新
+                self.presented_state = None
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                # 开关性能分析和叠加层，整屏刷新以擦除叠加层
+                frame_profiler.set_enabled(not frame_profiler.enabled)
+                self.presented_state = None
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                # 导出性能分析记录
+                if len(frame_profiler):
+                    print(f"性能分析记录已导出到 {frame_profiler.export()}")
+
             elif event.type == pygame.KEYDOWN:
                 if self.game_state == "MENU":
                     if event.key == pygame.K_SPACE:
@@ -155,11 +181,13 @@ class MazeGame:
         """开始游戏"""
         self.level_manager.load_level(1)
         self.game_engine.reset()
+        self.reset_simulation_clock()
         self.game_state = "PLAYING"
 
     def restart_level(self):
         """重新开始当前关卡"""
         self.game_engine.reset()
+        self.reset_simulation_clock()
         self.game_state = "PLAYING"
 
     def next_level(self):
@@ -167,20 +195,53 @@ class MazeGame:
         current_level = self.level_manager.current_level_num
         if self.level_manager.load_level(current_level + 1):
             self.game_engine.reset()
+            self.reset_simulation_clock()
             self.game_state = "PLAYING"
         else:
             # 所有关卡完成
             self.game_state = "MENU"
 
+    def reset_simulation_clock(self):
+        """清空积压的模拟时间，加载关卡花费的时间不计入模拟"""
+        self.last_update_ticks = pygame.time.get_ticks()
+        self.accumulator = 0
+        self.render_alpha = 1.0
+
     def update(self):
-        """更新游戏状态"""
-        if self.game_state == "PLAYING":
-            result = self.game_engine.update()
+        """按真实经过的时间执行零到多次固定步长的模拟"""
+        now = pygame.time.get_ticks()
+        elapsed = now - self.last_update_ticks
+        self.last_update_ticks = now
+        if self.game_state != "PLAYING":
+            return
+
+        step = 1000 / GameConfig.SIMULATION_RATE
+        self.accumulator += elapsed
+        steps = 0
+        while self.accumulator >= step:
+            # 防止死亡螺旋：一帧内追赶的步数有上限，其余积压时间丢弃
+            if steps >= GameConfig.MAX_SIMULATION_STEPS:
+                self.accumulator %= step
+                break
+
+            result = self.game_engine.update(step)
+            self.accumulator -= step
+            steps += 1
 
             if result == "GAME_OVER":
                 self.game_state = "GAME_OVER"
             elif result == "VICTORY":
                 self.game_state = "VICTORY"
+            if result != "PLAYING":
+                # 游戏结束后显示最终位置
+                self.accumulator = 0
+                self.render_alpha = 1.0
+                return
+
+        if GameConfig.RENDER_INTERPOLATION:
+            self.render_alpha = self.accumulator / step
+        else:
+            self.render_alpha = 1.0
 
     def render(self):
         """渲染游戏画面"""
@@ -190,32 +251,60 @@ class MazeGame:
             self.ui_manager.draw_menu()
 
         elif self.game_state == "PLAYING":
-            self.game_engine.render()
+            self.game_engine.render(self.render_alpha)
 
         elif self.game_state == "PAUSED":
-            self.game_engine.render()
+            self.game_engine.render(self.render_alpha)
             self.ui_manager.draw_pause_menu()
 
         elif self.game_state == "GAME_OVER":
-            self.game_engine.render()
+            self.game_engine.render(self.render_alpha)
             self.ui_manager.draw_game_over()
 
         elif self.game_state == "VICTORY":
-            self.game_engine.render()
+            self.game_engine.render(self.render_alpha)
             current_level = self.level_manager.current_level_num
             has_next = self.level_manager.has_next_level(current_level)
             self.ui_manager.draw_victory(has_next)
 
-        pygame.display.flip()
+        if frame_profiler.enabled:
+            self.ui_manager.draw_profiler_overlay(frame_profiler)
+            frame_profiler.mark("hud")
+
+        self.present()
+        if frame_profiler.enabled:
+            frame_profiler.mark("flip")
+
+    def present(self):
+        """把画面送到显示器，开启脏矩形渲染时只更新变化的区域"""
+        dirty_rects = None
+        if (GameConfig.DIRTY_RECT_RENDERING and self.game_state == "PLAYING" and
+                self.presented_state == "PLAYING" and not frame_profiler.enabled):
+            dirty_rects = self.game_engine.get_dirty_rects()
+        self.presented_state = self.game_state
+
+        # 摄像机移动、画面切换或显示性能分析叠加层时整屏刷新
+        if dirty_rects is None:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
 
     def run(self):
         """运行游戏主循环"""
         while self.running:
+            if frame_profiler.enabled:
+                frame_profiler.begin_frame()
             self.handle_events()
+            if frame_profiler.enabled:
+                frame_profiler.mark("events")
             self.update()
             self.render()
+            if frame_profiler.enabled:
+                frame_profiler.end_frame()
+            # FPS 只限制渲染帧率，游戏速度由固定的模拟步频决定
             self.clock.tick(GameConfig.FPS)
 
+        self.game_engine.shutdown()
         pygame.quit()
         sys.exit()
 
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+小地图静态层
+墙壁和终点每关只绘制一次，每帧只需要 blit 静态层再画上玩家和敌人的标记；
+开启战争迷雾时用位图记录已探索的格子，新探索的格子才从完整地图复制到静态层上
+"""
+
+import pygame
+from config import GameConfig
+from level_manager import get_level_grid
+
+
+class MiniMapLayer:
+    """一个关卡的小地图静态层"""
+
+    def __init__(self, level_data, rect, fog_of_war=False, explored=None):
+        """初始化小地图静态层，rect 是小地图在屏幕上的范围"""
+        self.level_data = level_data
+        self.rect = pygame.Rect(rect)
+        self.width = level_data["width"]
+        self.height = level_data["height"]
+        self.revision = get_level_grid(level_data).revision
+
+        # 计算缩放比例
+        self.scale = min(self.rect.width / self.width, self.rect.height / self.height)
+
+        # 终点标记会画出小地图范围，四周留出空白
+        self.margin = max(2, int(self.scale // 2)) + 1
+        self.full = self.render_full()
+
+        # 已探索格子的位图，每个格子一位
+        self.fog_of_war = fog_of_war
+        self.explored = None
+        self.revealed = 0
+        if fog_of_war:
+            self.explored = explored if explored is not None else bytearray((self.width * self.height + 7) // 8)
+            self.layer = self.render_fog()
+        else:
+            self.layer = self.full
+
+    def matches(self, level_data, rect, fog_of_war):
+        """检查静态层是否仍然适用于当前关卡"""
+        return (level_data is self.level_data and self.rect == rect and fog_of_war == self.fog_of_war and
+                get_level_grid(level_data).revision == self.revision)
+
+    def create_surface(self):
+        """创建带透明边距的小地图表面"""
+        size = (self.rect.width + self.margin * 2, self.rect.height + self.margin * 2)
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        return surface
+
+    def render_full(self):
+        """绘制完整的小地图：背景、边框、墙壁和终点"""
+        surface = self.create_surface()
+        origin_x = self.margin
+        origin_y = self.margin
+        scale = self.scale
+
+        # 小地图背景
+        background_rect = pygame.Rect(origin_x, origin_y, self.rect.width, self.rect.height)
+        pygame.draw.rect(surface, GameConfig.COLORS["BLACK"], background_rect)
+        pygame.draw.rect(surface, GameConfig.COLORS["WHITE"], background_rect, 2)
+
+        # 绘制墙壁
+        for wall in self.level_data["walls"]:
+            wall_rect = pygame.Rect(origin_x + wall[0] * scale, origin_y + wall[1] * scale,
+                                    wall[2] * scale, wall[3] * scale)
+            pygame.draw.rect(surface, GameConfig.COLORS["GRAY"], wall_rect)
+
+        # 绘制终点
+        goal = self.level_data["goal"]
+        pygame.draw.circle(surface, GameConfig.COLORS["GREEN"],
+                           (origin_x + int(goal[0] * scale), origin_y + int(goal[1] * scale)),
+                           max(2, int(scale // 2)))
+        return surface
+
+    def render_fog(self):
+        """绘制被迷雾覆盖的小地图，并补上已经探索过的格子"""
+        surface = self.create_surface()
+        background_rect = pygame.Rect(self.margin, self.margin, self.rect.width, self.rect.height)
+        pygame.draw.rect(surface, GameConfig.COLORS["DARK_GRAY"], background_rect)
+        pygame.draw.rect(surface, GameConfig.COLORS["WHITE"], background_rect, 2)
+        self.layer = surface
+
+        for index in range(self.width * self.height):
+            if self.explored[index >> 3] & (1 << (index & 7)):
+                self.paint_cell(index % self.width, index // self.width)
+        return surface
+
+    def is_explored(self, x, y):
+        """检查格子是否已经探索过"""
+        if self.explored is None:
+            return True
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+        index = y * self.width + x
+        return bool(self.explored[index >> 3] & (1 << (index & 7)))
+
+    def reveal(self, center_x, center_y, radius):
+        """探索以 (center_x, center_y) 为中心的圆形区域，只绘制新探索的格子"""
+        if self.explored is None:
+            return
+
+        explored = self.explored
+        radius_sq = radius * radius
+        for y in range(max(0, center_y - radius), min(self.height, center_y + radius + 1)):
+            dy = y - center_y
+            row = y * self.width
+            for x in range(max(0, center_x - radius), min(self.width, center_x + radius + 1)):
+                dx = x - center_x
+                if dx * dx + dy * dy > radius_sq:
+                    continue
+                index = row + x
+                bit = 1 << (index & 7)
+                if explored[index >> 3] & bit:
+                    continue
+                explored[index >> 3] |= bit
+                self.paint_cell(x, y)
+                self.revealed += 1
+
+    def paint_cell(self, x, y):
+        """把一个格子的内容从完整地图复制到静态层"""
+        scale = self.scale
+        left = self.margin + int(x * scale)
+        top = self.margin + int(y * scale)
+        right = self.margin + int((x + 1) * scale) + 1
+        bottom = self.margin + int((y + 1) * scale) + 1
+
+        # 边缘的格子连同边框和终点标记超出的部分一起复制
+        if x == 0:
+            left = 0
+        if y == 0:
+            top = 0
+        if x == self.width - 1:
+            right = self.layer.get_width()
+        if y == self.height - 1:
+            bottom = self.layer.get_height()
+
+        cell_rect = pygame.Rect(left, top, right - left, bottom - top)
+        self.layer.blit(self.full, cell_rect, cell_rect)
+
+    def blit(self, screen):
+        """把静态层画到屏幕上"""
+        screen.blit(self.layer, (self.rect.x - self.margin, self.rect.y - self.margin))
\ No newline at end of file
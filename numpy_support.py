@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy 可选依赖
+统一在这里尝试导入 NumPy，没有安装时 np 为 None，各模块据此退回纯Python的实现
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
\ No newline at end of file
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+粒子池
+固定容量的粒子系统，各字段存放在并行数组中，每帧一次批量更新；
+绘制时复用按 (颜色, 大小, 透明度档位) 预先生成的表面
+"""
+
+import random
+from array import array
+import pygame
+from config import GameConfig
+from numpy_support import np  # 没有安装 NumPy 时退回逐个粒子更新
+
+
+class ParticlePool:
+    """粒子池
+    存活的粒子始终排在数组前 count 个位置，死亡的粒子在更新时被压缩掉；
+    池满时新粒子直接丢弃。没有 NumPy 时退回逐个粒子更新
+    """
+
+    FIELDS = ("x", "y", "vx", "vy", "life", "size", "color")
+
+    def __init__(self, capacity=None):
+        """初始化粒子池"""
+        if capacity is None:
+            capacity = GameConfig.PARTICLE_CAPACITY
+        self.capacity = capacity
+        self.count = 0
+
+        if np is not None:
+            for name in self.FIELDS:
+                setattr(self, name, np.zeros(capacity, dtype=np.int32 if name == "color" else np.float64))
+        else:
+            for name in self.FIELDS:
+                setattr(self, name, array("i" if name == "color" else "d", [0]) * capacity)
+
+        # 颜色表和预先生成的粒子表面
+        self.colors = []
+        self.color_indices = {}
+        self.sprites = {}
+
+        # 统计信息
+        self.dropped = 0
+
+    def __len__(self):
+        """存活的粒子数量"""
+        return self.count
+
+    def clear(self):
+        """移除所有粒子"""
+        self.count = 0
+
+    def emit(self, x, y, color, count=10):
+        """在像素坐标 (x, y) 处产生一组粒子"""
+        color = tuple(color)
+        color_index = self.color_indices.get(color)
+        if color_index is None:
+            color_index = len(self.colors)
+            self.colors.append(color)
+            self.color_indices[color] = color_index
+
+        for _ in range(count):
+            vx = random.uniform(-2, 2)
+            vy = random.uniform(-2, 2)
+            size = random.randint(2, 6)
+            if self.count >= self.capacity:
+                self.dropped += 1
+                continue
+
+            index = self.count
+            self.x[index] = x
+            self.y[index] = y
+            self.vx[index] = vx
+            self.vy[index] = vy
+            self.life[index] = 1000  # 1秒生命周期
+            self.size[index] = size
+            self.color[index] = color_index
+            self.count += 1
+
+    def update(self, dt):
+        """更新所有粒子并压缩掉死亡的粒子"""
+        count = self.count
+        if count == 0:
+            return
+
+        if np is None:
+            self.update_python(dt)
+            return
+
+        step = dt / 16
+        self.x[:count] += self.vx[:count] * step
+        self.y[:count] += self.vy[:count] * step
+        self.life[:count] -= dt
+        np.maximum(self.size[:count] - dt / 200, 1, out=self.size[:count])
+
+        alive = self.life[:count] > 0
+        alive_count = int(np.count_nonzero(alive))
+        if alive_count < count:
+            for name in self.FIELDS:
+                field = getattr(self, name)
+                field[:alive_count] = field[:count][alive]
+        self.count = alive_count
+
+    def update_python(self, dt):
+        """没有 NumPy 时逐个更新粒子"""
+        alive_count = 0
+        for index in range(self.count):
+            life = self.life[index] - dt
+            if life <= 0:
+                continue
+            self.x[alive_count] = self.x[index] + self.vx[index] * dt / 16
+            self.y[alive_count] = self.y[index] + self.vy[index] * dt / 16
+            self.vx[alive_count] = self.vx[index]
+            self.vy[alive_count] = self.vy[index]
+            self.life[alive_count] = life
+            self.size[alive_count] = max(1, self.size[index] - dt / 200)
+            self.color[alive_count] = self.color[index]
+            alive_count += 1
+        self.count = alive_count
+
+    def get_sprite(self, color_index, size, alpha_level):
+        """获取预先生成的粒子表面"""
+        key = (color_index, size, alpha_level)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size * 2, size * 2))
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            sprite.fill(self.colors[color_index])
+            sprite.set_alpha(min(255, alpha_level * 256 // GameConfig.PARTICLE_ALPHA_LEVELS))
+            self.sprites[key] = sprite
+        return sprite
+
+    def draw(self, screen, offset_x, offset_y):
+        """绘制所有粒子，返回绘制的区域列表"""
+        count = self.count
+        if count == 0:
+            return []
+
+        # 根据生命周期调整透明度
+        levels = GameConfig.PARTICLE_ALPHA_LEVELS
+        if np is not None:
+            xs = (self.x[:count] + offset_x).astype(np.int64).tolist()
+            ys = (self.y[:count] + offset_y).astype(np.int64).tolist()
+            sizes = np.maximum(self.size[:count], 1).astype(np.int64).tolist()
+            alpha_levels = (self.life[:count] * levels / 1000).astype(np.int64).tolist()
+            colors = self.color[:count].tolist()
+        else:
+            xs = [int(value + offset_x) for value in self.x[:count]]
+            ys = [int(value + offset_y) for value in self.y[:count]]
+            sizes = [max(1, int(value)) for value in self.size[:count]]
+            alpha_levels = [int(value * levels / 1000) for value in self.life[:count]]
+            colors = self.color[:count].tolist()
+
+        get_sprite = self.get_sprite
+        blits = [(get_sprite(color, size, alpha_level), (x - size, y - size))
+                 for x, y, size, alpha_level, color in zip(xs, ys, sizes, alpha_levels, colors)]
+        return screen.blits(blits)
\ No newline at end of file
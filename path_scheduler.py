@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分帧寻路调度器
+多个敌人同时进入追击时，寻路请求会集中在同一帧；调度器把请求排队，
+每帧只在预算内推进搜索，没完成的搜索留到之后的帧继续。
+分帧搜索是普通的A*，游戏引擎只在选择了A*的关卡上使用调度器
+"""
+
+import time
+from config import GameConfig
+from pathfinding import PathSearch, route_cache
+
+
+class PathRequestScheduler:
+    """按帧预算执行的寻路调度器
+    接口与 PathWorkerPool 相同：submit() 排队请求，poll() 推进搜索并通过
+    owner.receive_path(path) 送回结果。离目标最近的请求优先，按轮转方式分配预算，
+    连续几帧没有分到预算的请求排到最前面，请求很多时也不会一直轮不到。
+    搜索进行中收到同一请求者的新请求时不重新开始，而是记下最新的请求，
+    当前搜索送回结果后再执行，频繁刷新的请求也总能拿到路径
+    """
+
+    def __init__(self, budget=None, slice_size=None, time_budget=None):
+        """初始化调度器"""
+        if budget is None:
+            budget = GameConfig.PATH_BUDGET_EXPANSIONS
+        if slice_size is None:
+            slice_size = GameConfig.PATH_SLICE_EXPANSIONS
+        if time_budget is None:
+            time_budget = GameConfig.PATH_BUDGET_MICROSECONDS
+        self.budget = budget
+        self.slice_size = slice_size
+        self.time_budget = time_budget
+
+        # 未完成的搜索 {请求者: PathSearch}
+        self.searches = {}
+        # 搜索进行中时收到的最新请求 {请求者: (起点, 终点)}
+        self.queued = {}
+        # 请求连续没有分到预算的帧数 {请求者: 帧数}
+        self.waiting = {}
+
+        # 统计信息
+        self.submitted = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.expanded = 0  # 上一帧展开的节点数
+
+    def submit(self, owner, grid, start, goal):
+        """提交寻路请求，缓存命中时立即送回结果"""
+        current = self.searches.get(owner)
+        if current is not None:
+            if current.grid is grid and current.revision == grid.revision:
+                # 继续当前的搜索，新请求等它完成后再执行
+                if (current.start, current.goal) == (start, goal):
+                    self.queued.pop(owner, None)
+                else:
+                    self.queued[owner] = (start, goal)
+                return
+            # 关卡或墙壁已经变化，旧搜索作废
+            del self.searches[owner]
+            self.dropped += 1
+
+        self.queued.pop(owner, None)
+        self.start_search(owner, grid, start, goal)
+
+    def start_search(self, owner, grid, start, goal):
+        """开始一次搜索，缓存命中时立即送回结果"""
+        route = route_cache.get(start, goal, grid.revision)
+        if route is not None:
+            owner.receive_path(list(route))
+            self.delivered += 1
+            return
+
+        self.searches[owner] = PathSearch(grid, start, goal)
+        self.submitted += 1
+
+    def poll(self):
+        """在本帧预算内推进搜索，把完成的结果送回请求者"""
+        self.expanded = 0
+        if not self.searches:
+            self.waiting.clear()
+            return
+
+        deadline = None
+        if self.time_budget > 0:
+            deadline = time.perf_counter() + self.time_budget / 1000000
+
+        # 等待越久的请求越优先，等待帧数相同时离目标越近的敌人越优先
+        queue = sorted(self.searches.items(),
+                       key=lambda item: (-self.waiting.get(item[0], 0), self.priority(*item)))
+        served = self.advance(queue, deadline)
+        self.waiting = {owner: 0 if owner in served else self.waiting.get(owner, 0) + 1
+                        for owner in self.searches}
+
+    def advance(self, queue, deadline):
+        """按轮转方式在本帧预算内推进搜索，返回分到预算的请求者"""
+        served = set()
+        remaining = self.budget
+        while queue and remaining > 0:
+            unfinished = []
+            for owner, search in queue:
+                if search.grid.revision != search.revision:
+                    # 墙壁变化后结果已失效，丢弃后执行排队的请求
+                    del self.searches[owner]
+                    self.dropped += 1
+                    self.start_queued(owner, search.grid)
+                    continue
+
+                used = search.step(min(self.slice_size, remaining))
+                remaining -= used
+                self.expanded += used
+                served.add(owner)
+
+                if search.done:
+                    del self.searches[owner]
+                    route_cache.put(search.start, search.goal, search.revision, search.path)
+                    owner.receive_path(search.path)
+                    self.delivered += 1
+                    self.start_queued(owner, search.grid)
+                else:
+                    unfinished.append((owner, search))
+
+                if remaining <= 0 or (deadline is not None and time.perf_counter() >= deadline):
+                    return served
+            queue = unfinished
+        return served
+
+    def start_queued(self, owner, grid):
+        """执行请求者排队的最新请求，在下一轮分配预算时开始推进"""
+        queued = self.queued.pop(owner, None)
+        if queued is not None:
+            self.start_search(owner, grid, queued[0], queued[1])
+
+    def priority(self, owner, search):
+        """请求的优先级，数值越小越先处理"""
+        dx = owner.x - search.goal[0]
+        dy = owner.y - search.goal[1]
+        return dx * dx + dy * dy
+
+    def cancel(self, owner):
+        """取消请求者的请求"""
+        self.searches.pop(owner, None)
+        self.queued.pop(owner, None)
+        self.waiting.pop(owner, None)
+
+    def shutdown(self):
+        """丢弃所有未完成的请求"""
+        self.searches.clear()
+        self.queued.clear()
+        self.waiting.clear()
\ No newline at end of file
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台寻路进程池
+大地图上单次寻路可能超过一帧的时间，把请求交给独立进程计算（不受GIL限制），
+结果在之后的帧里送回给请求者
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from config import GameConfig
+from level_manager import LevelGrid
+from pathfinding import find_path
+
+
+# 工作进程中的关卡网格
+_worker_grid = None
+
+
+def _init_worker(width, height, blocked, revision):
+    """工作进程初始化：根据占用数据重建关卡网格"""
+    global _worker_grid
+    _worker_grid = LevelGrid.from_occupancy(width, height, blocked, revision)
+
+
+def _worker_find_path(start, goal):
+    """在工作进程中执行寻路"""
+    return find_path(_worker_grid, start, goal)
+
+
+class PathWorkerPool:
+    """后台寻路进程池
+    每个请求者同一时间最多只有一个请求在计算，新请求会取消或合并掉旧请求；
+    poll() 只检查已完成的结果，从不阻塞
+    """
+
+    def __init__(self, workers=None):
+        """初始化进程池，进程在第一次提交请求时才启动"""
+        if workers is None:
+            workers = GameConfig.PATH_WORKER_COUNT
+        self.workers = workers
+        self.executor = None
+        self.grid = None
+        self.revision = None
+
+        # 正在计算的请求 {请求者: (Future, 起点, 终点)}
+        self.in_flight = {}
+        # 等待提交的最新请求 {请求者: (起点, 终点)}
+        self.queued = {}
+
+        # 统计信息
+        self.submitted = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def prepare(self, grid):
+        """保证工作进程持有与关卡网格一致的数据，关卡或墙壁变化时重启进程池"""
+        if self.executor is not None and grid is self.grid and grid.revision == self.revision:
+            return
+
+        self.shutdown()
+        self.grid = grid
+        self.revision = grid.revision
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(grid.width, grid.height, bytes(grid.blocked), grid.revision)
+        )
+
+    def submit(self, owner, grid, start, goal):
+        """提交寻路请求，结果通过 owner.receive_path(path) 送回"""
+        self.prepare(grid)
+
+        current = self.in_flight.get(owner)
+        if current is not None:
+            future, current_start, current_goal = current
+            if (current_start, current_goal) == (start, goal):
+                return
+            # 还没开始计算的旧请求直接取消，否则等它结束后再提交新请求
+            if not future.cancel():
+                self.queued[owner] = (start, goal)
+                return
+            del self.in_flight[owner]
+            self.dropped += 1
+
+        self.queued.pop(owner, None)
+        self.in_flight[owner] = (self.executor.submit(_worker_find_path, start, goal), start, goal)
+        self.submitted += 1
+
+    def poll(self):
+        """把已完成的结果送回请求者，并提交合并后的新请求"""
+        for owner, (future, start, goal) in list(self.in_flight.items()):
+            if not future.done():
+                continue
+            del self.in_flight[owner]
+
+            queued = self.queued.pop(owner, None)
+            if queued is not None:
+                # 结果已过时，丢弃并提交最新的请求
+                self.dropped += 1
+                self.submit(owner, self.grid, queued[0], queued[1])
+                continue
+
+            if future.cancelled() or future.exception() is not None:
+                self.dropped += 1
+                continue
+            owner.receive_path(future.result())
+            self.delivered += 1
+
+    def cancel(self, owner):
+        """取消请求者的全部请求"""
+        self.queued.pop(owner, None)
+        current = self.in_flight.pop(owner, None)
+        if current is not None:
+            current[0].cancel()
+
+    def cancel_all(self):
+        """取消所有请求者的请求，进程池保留；已经开始计算的请求结果会被丢弃"""
+        for future, _, _ in self.in_flight.values():
+            future.cancel()
+        self.in_flight.clear()
+        self.queued.clear()
+
+    def shutdown(self):
+        """关闭进程池，丢弃所有未完成的请求"""
+        self.cancel_all()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
\ No newline at end of file
@@ -0,0 +1,584 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+寻路模块
+提供基于关卡占用网格的共享寻路服务
+"""
+
+import heapq
+from array import array
+from collections import deque, OrderedDict
+from config import GameConfig
+from numpy_support import np  # 没有安装 NumPy 时距离场退回纯Python的BFS
+
+
+# 四方向邻居，顺序与敌人原来的BFS一致
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+class FlowField:
+    """以玩家所在格子为源点的距离场
+    所有追击的敌人共享同一次反向BFS，只在玩家换格子时重新计算
+    """
+
+    def __init__(self, max_distance=None):
+        """初始化距离场"""
+        if max_distance is None:
+            max_distance = GameConfig.FLOW_FIELD_RADIUS
+        self.max_distance = max_distance
+
+        self.grid = None
+        self.revision = None
+        self.goal = None
+        self.distances = None
+        self.dirty = False
+
+        # 统计信息
+        self.recompute_count = 0
+
+    def set_goal(self, grid, goal):
+        """设置目标格子，目标、关卡或墙壁变化时标记需要重新计算"""
+        if grid is not self.grid or grid.revision != self.revision or goal != self.goal:
+            self.grid = grid
+            self.revision = grid.revision
+            self.goal = goal
+            self.dirty = True
+
+    def recompute(self):
+        """从目标格子做一次有距离上限的BFS"""
+        from level_manager import compute_distance_map
+
+        grid = self.grid
+        width = grid.width
+        self.dirty = False
+        self.recompute_count += 1
+
+        # 有 NumPy 时使用向量化的距离图
+        if np is not None:
+            distance_map = compute_distance_map(grid, self.goal, self.max_distance)
+            self.distances = array("i", distance_map.tobytes())
+            return
+
+        # -1 表示未到达
+        distances = array("i", [-1]) * (width * grid.height)
+        self.distances = distances
+
+        goal_x, goal_y = self.goal
+        if grid.is_blocked(goal_x, goal_y):
+            return
+
+        distances[goal_y * width + goal_x] = 0
+        queue = deque([(goal_x, goal_y)])
+        max_distance = self.max_distance
+
+        while queue:
+            x, y = queue.popleft()
+            next_distance = distances[y * width + x] + 1
+            if next_distance > max_distance:
+                continue
+
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if grid.is_blocked(nx, ny):
+                    continue
+                index = ny * width + nx
+                if distances[index] < 0:
+                    distances[index] = next_distance
+                    queue.append((nx, ny))
+
+    def distance(self, x, y):
+        """获取格子到目标的步数，未覆盖返回-1"""
+        if self.grid is None:
+            return -1
+        if self.dirty:
+            self.recompute()
+        if x < 0 or y < 0 or x >= self.grid.width or y >= self.grid.height:
+            return -1
+        return self.distances[y * self.grid.width + x]
+
+    def next_step(self, x, y):
+        """获取从格子出发朝目标走的下一步，没有则返回None"""
+        current = self.distance(x, y)
+        if current <= 0:
+            return None
+
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if self.distance(nx, ny) == current - 1:
+                return nx, ny
+        return None
+
+    def get_path(self, start):
+        """沿距离场下降得到从起点到目标的路径，起点不在覆盖范围内时返回空列表"""
+        current = self.distance(start[0], start[1])
+        if current < 0:
+            return []
+
+        path = [start]
+        x, y = start
+        while current > 0:
+            x, y = self.next_step(x, y)
+            path.append((x, y))
+            current -= 1
+        return path
+
+
+class AStarPathfinder:
+    """A* 寻路引擎
+    使用曼哈顿距离启发式和父指针回溯路径；
+    g值、父指针和开/闭表标记都是预分配的数组，通过搜索代数复用，不需要每次清空
+    """
+
+    def __init__(self):
+        """初始化寻路引擎"""
+        self.capacity = 0
+        self.g_score = array("i")
+        self.parent = array("i")
+        self.opened = array("I")  # 记录格子在哪一代搜索中被加入开表
+        self.closed = array("I")  # 记录格子在哪一代搜索中被关闭
+        self.generation = 0
+
+        # 上一次搜索展开的节点数
+        self.expanded = 0
+
+    def ensure_capacity(self, size):
+        """保证数组能容纳指定数量的格子"""
+        if size <= self.capacity:
+            return
+        self.capacity = size
+        self.g_score = array("i", [0]) * size
+        self.parent = array("i", [-1]) * size
+        self.opened = array("I", [0]) * size
+        self.closed = array("I", [0]) * size
+        self.generation = 0
+
+    def next_generation(self):
+        """开始新一代搜索，代数溢出时清空标记"""
+        self.generation += 1
+        if self.generation >= 0xFFFFFFFF:
+            for index in range(self.capacity):
+                self.opened[index] = 0
+                self.closed[index] = 0
+            self.generation = 1
+        return self.generation
+
+    def find_path(self, grid, start, goal, bounds=None):
+        """寻找从起点到终点的最短路径，返回包含两端的格子列表，找不到返回空列表
+
+        bounds 为 (x0, y0, x1, y1) 时只在该矩形范围内搜索，右下边界不包含
+        """
+        if start == goal:
+            return [start]
+        if grid.is_blocked(goal[0], goal[1]):
+            return []
+
+        width = grid.width
+        blocked = grid.blocked
+        min_x, min_y, max_x, max_y = bounds if bounds is not None else (0, 0, width, grid.height)
+        self.ensure_capacity(width * grid.height)
+        generation = self.next_generation()
+
+        g_score = self.g_score
+        parent = self.parent
+        opened = self.opened
+        closed = self.closed
+
+        start_x, start_y = start
+        goal_x, goal_y = goal
+        start_index = start_y * width + start_x
+        goal_index = goal_y * width + goal_x
+
+        g_score[start_index] = 0
+        parent[start_index] = -1
+        opened[start_index] = generation
+        start_h = abs(goal_x - start_x) + abs(goal_y - start_y)
+        open_heap = [(start_h, start_h, start_index)]
+        expanded = 0
+
+        while open_heap:
+            _, _, index = heapq.heappop(open_heap)
+            if closed[index] == generation:
+                continue
+            closed[index] = generation
+            expanded += 1
+
+            if index == goal_index:
+                self.expanded = expanded
+                return self.reconstruct_path(index, width)
+
+            x = index % width
+            y = index // width
+            next_g = g_score[index] + 1
+
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if nx < min_x or ny < min_y or nx >= max_x or ny >= max_y:
+                    continue
+                neighbor = ny * width + nx
+                if blocked[neighbor] or closed[neighbor] == generation:
+                    continue
+                if opened[neighbor] == generation and g_score[neighbor] <= next_g:
+                    continue
+
+                opened[neighbor] = generation
+                g_score[neighbor] = next_g
+                parent[neighbor] = index
+                h = abs(goal_x - nx) + abs(goal_y - ny)
+                heapq.heappush(open_heap, (next_g + h, h, neighbor))
+
+        self.expanded = expanded
+        return []
+
+    def reconstruct_path(self, index, width):
+        """沿父指针回溯出路径"""
+        path = []
+        parent = self.parent
+        while index >= 0:
+            path.append((index % width, index // width))
+            index = parent[index]
+        path.reverse()
+        return path
+
+
+class JumpPointSearch(AStarPathfinder):
+    """跳点搜索 (JPS) 寻路引擎
+    适用于四方向移动：沿直线跳过没有强制邻居的格子，开阔区域只需展开少量跳点；
+    与A*共用预分配数组，返回前把跳点之间的直线段展开成逐格路径。
+    搜索在四周各加一圈墙的填充网格上进行，跳跃时不需要做边界判断
+    """
+
+    def __init__(self):
+        """初始化寻路引擎"""
+        super().__init__()
+        self.padded = None
+        self.padded_key = None
+
+    def build_padded(self, grid, bounds):
+        """构建四周加一圈墙的占用网格，范围外的格子都视为墙"""
+        key = (grid, grid.revision, bounds)
+        if self.padded_key == key:
+            return self.padded
+
+        x0, y0, x1, y1 = bounds
+        stride = grid.width + 2
+        padded = bytearray(b"\x01") * (stride * (grid.height + 2))
+        for y in range(y0, y1):
+            row = y * grid.width
+            start = (y + 1) * stride + 1
+            padded[start + x0:start + x1] = grid.blocked[row + x0:row + x1]
+
+        self.padded = padded
+        self.padded_key = key
+        return padded
+
+    def find_path(self, grid, start, goal, bounds=None):
+        """寻找从起点到终点的最短路径，返回包含两端的格子列表，找不到返回空列表"""
+        if start == goal:
+            return [start]
+        if grid.is_blocked(goal[0], goal[1]):
+            return []
+
+        if bounds is None:
+            bounds = (0, 0, grid.width, grid.height)
+        cells = self.build_padded(grid, bounds)
+        stride = grid.width + 2
+        self.ensure_capacity(len(cells))
+        generation = self.next_generation()
+
+        g_score = self.g_score
+        parent = self.parent
+        opened = self.opened
+        closed = self.closed
+
+        goal_x, goal_y = goal
+        start_index = (start[1] + 1) * stride + start[0] + 1
+        goal_index = (goal_y + 1) * stride + goal_x + 1
+
+        g_score[start_index] = 0
+        parent[start_index] = -1
+        opened[start_index] = generation
+        start_h = abs(goal_x - start[0]) + abs(goal_y - start[1])
+        open_heap = [(start_h, start_h, start_index)]
+        expanded = 0
+
+        while open_heap:
+            _, _, index = heapq.heappop(open_heap)
+            if closed[index] == generation:
+                continue
+            closed[index] = generation
+            expanded += 1
+
+            if index == goal_index:
+                self.expanded = expanded
+                return self.expand_jump_points(self.reconstruct_path(index, stride))
+
+            for step in self.prune_steps(index, stride):
+                if step == 1 or step == -1:
+                    jump_point = self.jump_horizontal(cells, index, step, stride, goal_index)
+                else:
+                    jump_point = self.jump_vertical(cells, index, step, stride, goal_index)
+                if jump_point is None or closed[jump_point] == generation:
+                    continue
+
+                # 跳点和当前格子在同一直线上
+                distance = abs(jump_point - index)
+                if distance >= stride:
+                    distance //= stride
+                next_g = g_score[index] + distance
+                if opened[jump_point] == generation and g_score[jump_point] <= next_g:
+                    continue
+
+                opened[jump_point] = generation
+                g_score[jump_point] = next_g
+                parent[jump_point] = index
+                h = abs(goal_x + 1 - jump_point % stride) + abs(goal_y + 1 - jump_point // stride)
+                heapq.heappush(open_heap, (next_g + h, h, jump_point))
+
+        self.expanded = expanded
+        return []
+
+    def prune_steps(self, index, stride):
+        """根据来时的方向裁剪需要继续跳跃的方向（以索引步长表示）"""
+        parent_index = self.parent[index]
+        if parent_index < 0:
+            return 1, -1, stride, -stride
+
+        if index // stride == parent_index // stride:
+            step = 1 if index > parent_index else -1
+            return -stride, stride, step
+        step = stride if index > parent_index else -stride
+        return -1, 1, step
+
+    def jump_horizontal(self, cells, index, step, stride, goal_index):
+        """水平方向跳跃，返回遇到的跳点索引，撞墙返回None"""
+        while True:
+            index += step
+            if cells[index]:
+                return None
+            if index == goal_index:
+                return index
+            # 强制邻居：上下方可走而身后的上下方被挡住
+            up = index - stride
+            down = index + stride
+            if (not cells[up] and cells[up - step]) or (not cells[down] and cells[down - step]):
+                return index
+
+    def jump_vertical(self, cells, index, step, stride, goal_index):
+        """竖直方向跳跃，途中每一格都要检查水平方向是否有跳点"""
+        while True:
+            index += step
+            if cells[index]:
+                return None
+            if index == goal_index:
+                return index
+            if (not cells[index - 1] and cells[index - 1 - step]) or \
+                    (not cells[index + 1] and cells[index + 1 - step]):
+                return index
+            if self.jump_horizontal(cells, index, 1, stride, goal_index) is not None or \
+                    self.jump_horizontal(cells, index, -1, stride, goal_index) is not None:
+                return index
+
+    def expand_jump_points(self, jump_points):
+        """把跳点之间的直线段展开成逐格路径，同时去掉填充的偏移"""
+        path = [(jump_points[0][0] - 1, jump_points[0][1] - 1)]
+        for (x1, y1), (x2, y2) in zip(jump_points, jump_points[1:]):
+            step_x = (x2 > x1) - (x2 < x1)
+            step_y = (y2 > y1) - (y2 < y1)
+            x, y = x1, y1
+            while (x, y) != (x2, y2):
+                x += step_x
+                y += step_y
+                path.append((x - 1, y - 1))
+        return path
+
+
+class PathSearch:
+    """可分帧执行的A*搜索
+    每个搜索持有自己的开放表和父指针，step() 每次最多展开指定数量的节点，
+    没有完成的搜索可以在之后的帧里继续；结果与 AStarPathfinder 相同
+    """
+
+    def __init__(self, grid, start, goal):
+        """初始化搜索"""
+        self.grid = grid
+        self.revision = grid.revision
+        self.start = start
+        self.goal = goal
+        self.g_score = {}
+        self.parent = {}
+        self.closed = set()
+        self.open_heap = []
+        self.expanded = 0
+        self.done = False
+        self.path = []
+
+        if start == goal:
+            self.finish([start])
+        elif grid.is_blocked(goal[0], goal[1]):
+            self.finish([])
+        else:
+            start_index = start[1] * grid.width + start[0]
+            start_h = abs(goal[0] - start[0]) + abs(goal[1] - start[1])
+            self.g_score[start_index] = 0
+            self.parent[start_index] = -1
+            self.open_heap.append((start_h, start_h, start_index))
+
+    def finish(self, path):
+        """结束搜索并释放中间状态"""
+        self.done = True
+        self.path = path
+        self.g_score = {}
+        self.parent = {}
+        self.closed = set()
+        self.open_heap = []
+
+    def step(self, max_expansions):
+        """继续搜索，最多展开 max_expansions 个节点，返回实际展开的数量"""
+        if self.done:
+            return 0
+
+        grid = self.grid
+        width = grid.width
+        height = grid.height
+        blocked = grid.blocked
+        g_score = self.g_score
+        parent = self.parent
+        closed = self.closed
+        open_heap = self.open_heap
+        goal_x, goal_y = self.goal
+        goal_index = goal_y * width + goal_x
+        expanded = 0
+
+        while open_heap and expanded < max_expansions:
+            _, _, index = heapq.heappop(open_heap)
+            if index in closed:
+                continue
+            closed.add(index)
+            expanded += 1
+
+            if index == goal_index:
+                path = []
+                while index >= 0:
+                    path.append((index % width, index // width))
+                    index = parent[index]
+                path.reverse()
+                self.expanded += expanded
+                self.finish(path)
+                return expanded
+
+            x = index % width
+            y = index // width
+            next_g = g_score[index] + 1
+
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                    continue
+                neighbor = ny * width + nx
+                if blocked[neighbor] or neighbor in closed:
+                    continue
+                if g_score.get(neighbor, next_g + 1) <= next_g:
+                    continue
+
+                g_score[neighbor] = next_g
+                parent[neighbor] = index
+                h = abs(goal_x - nx) + abs(goal_y - ny)
+                heapq.heappush(open_heap, (next_g + h, h, neighbor))
+
+        self.expanded += expanded
+        if not open_heap:
+            self.finish([])
+        return expanded
+
+
+class RouteCache:
+    """路径缓存
+    以 (起点, 终点, 墙壁版本号) 为键，按最近最少使用淘汰；墙壁版本变化时整体清空
+    """
+
+    def __init__(self, capacity=None):
+        """初始化路径缓存"""
+        if capacity is None:
+            capacity = GameConfig.ROUTE_CACHE_SIZE
+        self.capacity = capacity
+        self.routes = OrderedDict()
+        self.revision = None
+
+        # 命中统计
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, start, goal, revision):
+        """查询缓存，未命中返回None"""
+        if revision != self.revision:
+            self.clear()
+            self.revision = revision
+
+        key = (start, goal, revision)
+        route = self.routes.get(key)
+        if route is None:
+            self.misses += 1
+            return None
+
+        self.routes.move_to_end(key)
+        self.hits += 1
+        return route
+
+    def put(self, start, goal, revision, route):
+        """写入缓存，超出容量时淘汰最久未使用的路径"""
+        if revision != self.revision:
+            self.clear()
+            self.revision = revision
+
+        key = (start, goal, revision)
+        self.routes[key] = tuple(route)
+        self.routes.move_to_end(key)
+        while len(self.routes) > self.capacity:
+            self.routes.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        self.routes.clear()
+
+    def hit_rate(self):
+        """获取命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# 全局共享的寻路引擎，数组在多次调用之间复用
+_backends = {
+    "astar": AStarPathfinder(),
+    "jps": JumpPointSearch()
+}
+
+# 全局共享的路径缓存
+route_cache = RouteCache()
+
+
+def get_backend_name(grid):
+    """选择关卡使用的寻路算法
+    格子数达到 HPA_MIN_CELLS 的大地图总是使用分层寻路 ("hpa")，优先于 PATHFINDING_BACKEND 的设置
+    """
+    if grid.width * grid.height >= GameConfig.HPA_MIN_CELLS:
+        return "hpa"
+    return GameConfig.PATHFINDING_BACKEND
+
+
+def find_path(grid, start, goal):
+    """在关卡网格上寻找从起点到终点的路径，优先从路径缓存读取"""
+    route = route_cache.get(start, goal, grid.revision)
+    if route is None:
+        backend = get_backend_name(grid)
+        if backend == "hpa":
+            # 大地图使用网格上的分层寻路器，只细化前面几段
+            route = grid.get_hierarchy().find_path(start, goal, GameConfig.HPA_REFINE_SEGMENTS)
+        else:
+            route = _backends[backend].find_path(grid, start, goal)
+
+        # 只细化了前面几段的路径没有到达终点，不写入缓存
+        if not route or route[-1] == goal:
+            route_cache.put(start, goal, grid.revision, route)
+
+    # 返回新列表，调用者会在移动时修改路径
+    return list(route)
\ No newline at end of file
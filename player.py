@@ -8,15 +8,19 @@
 import pygame
 import math
 from config import GameConfig
+from level_manager import get_level_grid, TILE_SWAMP, TILE_TRAP
+from sprite_cache import sprite_cache
 
 
 class Player:
-    def __init__(self, x, y):
-        """初始化玩家"""
+    def __init__(self, x, y, input_source=None):
+        """初始化玩家，input_source 返回按键状态，为None时读取键盘"""
         self.start_x = x
         self.start_y = y
         self.x = float(x)  # 确保使用浮点数
         self.y = float(y)  # 确保使用浮点数
+        self.previous_x = self.x  # 上一次模拟步的位置，用于渲染插值
+        self.previous_y = self.y
         self.speed = GameConfig.PLAYER_SPEED
         self.lives = GameConfig.PLAYER_LIVES
         self.score = 0
@@ -38,12 +42,17 @@ class Player:
         # 移动方向
         self.direction = "down"  # up, down, left, right
 
-        print(f"Player initialized at ({self.x}, {self.y})")  # 调试信息
+        # 输入来源，无界面模拟时由脚本提供按键状态
+        self.input_source = input_source
+
+        if GameConfig.DEBUG:
+            print(f"Player initialized at ({self.x}, {self.y})")  # 调试信息
 
     def reset(self):
         """重置玩家状态"""
         self.x = float(self.start_x)
         self.y = float(self.start_y)
+        self.store_previous_position()
         self.is_moving = False
         self.in_swamp = False
         self.invincible = False
@@ -53,7 +62,8 @@ class Player:
         self.animation_frame = 0
         self.animation_timer = 0
         self.direction = "down"
-        print(f"Player reset to ({self.x}, {self.y})")  # 调试信息
+        if GameConfig.DEBUG:
+            print(f"Player reset to ({self.x}, {self.y})")  # 调试信息
 
     def update(self, dt, level_data):
         """更新玩家状态"""
@@ -82,7 +92,7 @@ class Player:
 
     def handle_input(self, dt, level_data):
         """处理玩家输入 - 修复版本"""
-        keys = pygame.key.get_pressed()
+        keys = self.input_source() if self.input_source is not None else pygame.key.get_pressed()
         dx = dy = 0
         self.is_moving = False
 
@@ -101,76 +111,69 @@ class Player:
             dy = -move_distance
             self.direction = "up"
             self.is_moving = True
-            print(f"Moving up: dy={dy}")  # 调试信息
+            if GameConfig.DEBUG:
+                print(f"Moving up: dy={dy}")  # 调试信息
         elif keys[pygame.K_s] or keys[pygame.K_DOWN]:
             dy = move_distance
             self.direction = "down"
             self.is_moving = True
-            print(f"Moving down: dy={dy}")  # 调试信息
+            if GameConfig.DEBUG:
+                print(f"Moving down: dy={dy}")  # 调试信息
 
         if keys[pygame.K_a] or keys[pygame.K_LEFT]:
             dx = -move_distance
             self.direction = "left"
             self.is_moving = True
-            print(f"Moving left: dx={dx}")  # 调试信息
+            if GameConfig.DEBUG:
+                print(f"Moving left: dx={dx}")  # 调试信息
         elif keys[pygame.K_d] or keys[pygame.K_RIGHT]:
             dx = move_distance
             self.direction = "right"
             self.is_moving = True
-            print(f"Moving right: dx={dx}")  # 调试信息
+            if GameConfig.DEBUG:
+                print(f"Moving right: dx={dx}")  # 调试信息
 
         # 检查碰撞并移动
         if dx != 0:
             new_x = self.x + dx
             if self.can_move_to(new_x, self.y, level_data):
                 self.x = new_x
-                print(f"Player moved to x={self.x}")  # 调试信息
+                if GameConfig.DEBUG:
+                    print(f"Player moved to x={self.x}")  # 调试信息
 
         if dy != 0:
             new_y = self.y + dy
             if self.can_move_to(self.x, new_y, level_data):
                 self.y = new_y
-                print(f"Player moved to y={self.y}")  # 调试信息
+                if GameConfig.DEBUG:
+                    print(f"Player moved to y={self.y}")  # 调试信息
 
     def can_move_to(self, x, y, level_data):
         """检查是否可以移动到指定位置"""
         # 检查边界
         if x < 0 or y < 0 or x >= level_data["width"] or y >= level_data["height"]:
-            print(f"Boundary check failed: ({x}, {y}) vs ({level_data['width']}, {level_data['height']})")
+            if GameConfig.DEBUG:
+                print(f"Boundary check failed: ({x}, {y}) vs ({level_data['width']}, {level_data['height']})")
             return False
 
-        # 检查墙壁碰撞 - 使用网格坐标检查
-        grid_x = int(x)
-        grid_y = int(y)
-
-        for wall in level_data["walls"]:
-            wall_x, wall_y, wall_w, wall_h = wall
-            if (wall_x <= grid_x < wall_x + wall_w and
-                    wall_y <= grid_y < wall_y + wall_h):
-                print(f"Wall collision at ({grid_x}, {grid_y})")
-                return False
+        # 检查墙壁碰撞 - 使用网格坐标查询占用网格
+        if get_level_grid(level_data).is_blocked(x, y):
+            if GameConfig.DEBUG:
+                print(f"Wall collision at ({int(x)}, {int(y)})")
+            return False
 
         return True
 
     def check_tile_effects(self, level_data):
         """检查当前位置的地形效果"""
-        grid_x = int(self.x)
-        grid_y = int(self.y)
-
-        # 重置沼泽状态
-        self.in_swamp = False
+        tile = get_level_grid(level_data).get_tile(int(self.x), int(self.y))
 
         # 检查沼泽
-        for swamp in level_data["swamps"]:
-            if grid_x == swamp[0] and grid_y == swamp[1]:
-                self.in_swamp = True
-                break
+        self.in_swamp = bool(tile & TILE_SWAMP)
 
         # 检查陷阱
-        for trap in level_data["traps"]:
-            if grid_x == trap[0] and grid_y == trap[1]:
-                self.hit_trap()
-                break
+        if tile & TILE_TRAP:
+            self.hit_trap()
 
     def hit_trap(self):
         """触发陷阱"""
@@ -211,27 +214,52 @@ class Player:
         grid_y = int(self.y)
         return grid_x == goal_pos[0] and grid_y == goal_pos[1]
 
+    def store_previous_position(self):
+        """记录模拟步开始前的位置，用于渲染插值"""
+        self.previous_x = self.x
+        self.previous_y = self.y
+
+    def get_render_position(self, alpha):
+        """获取绘制位置：在上一次和本次模拟步的位置之间按 alpha 插值"""
+        if alpha >= 1:
+            return self.x, self.y
+        return (self.previous_x + (self.x - self.previous_x) * alpha,
+                self.previous_y + (self.y - self.previous_y) * alpha)
+
     def get_rect(self):
         """获取玩家矩形"""
         return pygame.Rect(self.x * GameConfig.TILE_SIZE, self.y * GameConfig.TILE_SIZE,
                            GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
 
-    def draw(self, screen, offset_x, offset_y):
-        """绘制玩家"""
-        x = self.x * GameConfig.TILE_SIZE + offset_x
-        y = self.y * GameConfig.TILE_SIZE + offset_y
+    def get_dirty_rect(self, offset_x, offset_y, alpha=1.0):
+        """获取玩家在屏幕上绘制的范围，包括速度加成边框和跳跃动画"""
+        render_x, render_y = self.get_render_position(alpha)
+        x = render_x * GameConfig.TILE_SIZE + offset_x
+        y = render_y * GameConfig.TILE_SIZE + offset_y
+        return pygame.Rect(x - 3, y - 3, GameConfig.TILE_SIZE + 6, GameConfig.TILE_SIZE + 6)
+
+    def draw(self, screen, offset_x, offset_y, alpha=1.0):
+        """绘制玩家，alpha 为两次模拟步之间的插值系数"""
+        render_x, render_y = self.get_render_position(alpha)
+        x = render_x * GameConfig.TILE_SIZE + offset_x
+        y = render_y * GameConfig.TILE_SIZE + offset_y
 
+        # 无敌状态闪烁效果，每100ms闪烁一次
+        flash = self.invincible and (pygame.time.get_ticks() // 100) % 2 == 1
+        jumping = self.is_moving and self.animation_frame % 2 == 1
+
+        key = ("player", self.direction, jumping, self.speed_boost, flash)
+        sprite_cache.blit(screen, key, x, y, lambda surface, sx, sy: self.draw_shape(surface, sx, sy, flash))
+
+    def draw_shape(self, screen, x, y, flash):
+        """用基本图形绘制玩家，结果由精灵缓存保存"""
         # 玩家矩形
         player_rect = pygame.Rect(x, y, GameConfig.TILE_SIZE, GameConfig.TILE_SIZE)
 
         # 根据状态选择颜色
         color = GameConfig.COLORS[GameConfig.ELEMENT_COLORS["PLAYER"]]
-
-        # 无敌状态闪烁效果
-        if self.invincible:
-            time_ms = pygame.time.get_ticks()
-            if (time_ms // 100) % 2:  # 每100ms闪烁一次
-                color = GameConfig.COLORS["WHITE"]
+        if flash:
+            color = GameConfig.COLORS["WHITE"]
 
         # 速度加成效果
         if self.speed_boost:
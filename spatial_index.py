@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块空间索引
+把陷阱、道具、敌人等对象按所在的格子分配到固定大小的分块中，
+渲染时只查询与可见区域相交的分块，开销只与屏幕大小有关，与关卡大小无关
+"""
+
+import itertools
+from config import GameConfig
+
+
+class SpatialIndex:
+    """分块空间索引
+    对象按种类分别存放；静态对象插入一次，动态对象在位置改变后调用 move() 更新，
+    只有跨越分块时才真正移动。query() 按插入顺序返回对象，保持原来的绘制顺序
+    """
+
+    def __init__(self, chunk_size=None):
+        """初始化空间索引"""
+        if chunk_size is None:
+            chunk_size = GameConfig.SPATIAL_CHUNK_SIZE
+        self.chunk_size = chunk_size
+
+        # {种类: {分块坐标: {对象id: (插入顺序, 对象)}}}
+        self.buckets = {}
+        # {对象id: (种类, 插入顺序, 所在的分块坐标列表)}
+        self.locations = {}
+        self.order = itertools.count()
+
+    def chunk_keys(self, x, y, width=1, height=1):
+        """获取格子范围覆盖的分块坐标"""
+        size = self.chunk_size
+        return [(chunk_x, chunk_y)
+                for chunk_y in range(int(y) // size, (int(y) + max(1, height) - 1) // size + 1)
+                for chunk_x in range(int(x) // size, (int(x) + max(1, width) - 1) // size + 1)]
+
+    def insert(self, kind, item, x, y, width=1, height=1):
+        """插入一个对象，(x, y, width, height) 是它占据的格子范围"""
+        self.remove(item)
+        self.place(kind, item, next(self.order), self.chunk_keys(x, y, width, height))
+
+    def place(self, kind, item, order, keys):
+        """把对象放入指定的分块"""
+        buckets = self.buckets.setdefault(kind, {})
+        for key in keys:
+            buckets.setdefault(key, {})[id(item)] = (order, item)
+        self.locations[id(item)] = (kind, order, keys)
+
+    def move(self, kind, item, x, y):
+        """更新单格对象的位置，所在分块不变时不做任何事"""
+        size = self.chunk_size
+        key = (int(x) // size, int(y) // size)
+        location = self.locations.get(id(item))
+        if location is None:
+            self.place(kind, item, next(self.order), [key])
+            return
+        if location[2] == [key]:
+            return
+        self.remove(item)
+        self.place(kind, item, location[1], [key])
+
+    def remove(self, item):
+        """移除一个对象"""
+        location = self.locations.pop(id(item), None)
+        if location is None:
+            return
+        kind, _, keys = location
+        buckets = self.buckets[kind]
+        for key in keys:
+            bucket = buckets[key]
+            del bucket[id(item)]
+            if not bucket:
+                del buckets[key]
+
+    def query(self, kind, bounds):
+        """获取与格子范围 bounds=(x0, y0, x1, y1) 所在分块相交的对象，按插入顺序排列"""
+        buckets = self.buckets.get(kind)
+        if not buckets:
+            return []
+
+        start_x, start_y, end_x, end_y = bounds
+        if end_x <= start_x or end_y <= start_y:
+            return []
+        size = self.chunk_size
+        found = {}
+        for chunk_y in range(start_y // size, (end_y - 1) // size + 1):
+            for chunk_x in range(start_x // size, (end_x - 1) // size + 1):
+                bucket = buckets.get((chunk_x, chunk_y))
+                if bucket:
+                    found.update(bucket)
+        return [item for _, item in sorted(found.values(), key=lambda entry: entry[0])]
+
+    def clear(self, kind=None):
+        """清空索引，指定种类时只清空该种类"""
+        if kind is None:
+            self.buckets.clear()
+            self.locations.clear()
+            return
+        for bucket in self.buckets.pop(kind, {}).values():
+            for item_id in bucket:
+                self.locations.pop(item_id, None)
\ No newline at end of file
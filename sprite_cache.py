@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实体精灵缓存
+玩家、敌人和道具由十几个基本图形拼成，每种外观状态只绘制一次，
+之后每帧只需要一次 blit
+"""
+
+import math
+import pygame
+from config import GameConfig
+
+
+class SpriteCache:
+    """精灵缓存
+    以 (实体类型, 方向, 动画帧, 状态...) 为键缓存绘制好的表面；
+    瓦片大小或颜色配置变化后整体重建
+    """
+
+    # 精灵四周留出的空白，容纳边框、浮动和头顶标志等超出瓦片的部分
+    PADDING = 16
+
+    def __init__(self):
+        """初始化精灵缓存"""
+        self.sprites = {}
+        self.signature = None
+
+        # 统计信息
+        self.built = 0
+
+    def validate(self):
+        """检查瓦片大小和颜色配置，有变化时清空缓存"""
+        signature = (GameConfig.TILE_SIZE,
+                     tuple(sorted(GameConfig.COLORS.items())),
+                     tuple(sorted(GameConfig.ELEMENT_COLORS.items())))
+        if signature != self.signature:
+            self.sprites.clear()
+            self.signature = signature
+
+    def get(self, key, draw):
+        """获取精灵，不在缓存中时调用 draw(surface, x, y) 在 (x, y) 处绘制实体"""
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            size = GameConfig.TILE_SIZE + self.PADDING * 2
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            draw(sprite, self.PADDING, self.PADDING)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+            self.built += 1
+        return sprite
+
+    def get_translucent(self, color, size, alpha):
+        """获取整体半透明的纯色表面"""
+        key = ("translucent", color, size, alpha)
+        surface = self.sprites.get(key)
+        if surface is None:
+            surface = pygame.Surface(size)
+            surface.set_alpha(alpha)
+            surface.fill(color)
+            self.sprites[key] = surface
+            self.built += 1
+        return surface
+
+    def blit(self, screen, key, x, y, draw):
+        """把精灵画到屏幕上，(x, y) 是实体瓦片左上角的屏幕坐标，返回绘制的区域"""
+        sprite = self.get(key, draw)
+        return screen.blit(sprite, (math.floor(x) - self.PADDING, math.floor(y) - self.PADDING))
+
+    def clear(self):
+        """清空缓存"""
+        self.sprites.clear()
+
+
+# 全局共享的精灵缓存
+sprite_cache = SpriteCache()
\ No newline at end of file
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文字表面缓存
+HUD 和菜单上的文字大多每帧都一样，渲染结果按 (字体, 文字, 颜色, 抗锯齿) 缓存，
+只有内容变化时才重新渲染
+"""
+
+from collections import OrderedDict
+import pygame
+from config import GameConfig
+
+
+class TextCache:
+    """文字表面缓存
+    按最近最少使用淘汰；返回的表面是共享的，调用者只能 blit，不能修改
+    """
+
+    def __init__(self, capacity=None):
+        """初始化文字缓存"""
+        if capacity is None:
+            capacity = GameConfig.TEXT_CACHE_SIZE
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.fonts = {}
+
+        # 命中统计
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, name, size):
+        """获取字体对象，同一字体只加载一次"""
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(name, size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, font, text, color, antialias=True):
+        """渲染文字，缓存命中时直接返回之前的表面"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        while len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """清空缓存"""
+        self.surfaces.clear()
+
+    def hit_rate(self):
+        """获取命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# 全局共享的文字缓存
+text_cache = TextCache()
\ No newline at end of file
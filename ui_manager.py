@@ -8,6 +8,8 @@ UI管理器 - 修复版本
 import pygame
 import sys
 from config import GameConfig
+from text_cache import text_cache
+from minimap import MiniMapLayer
 
 
 class UIManager:
@@ -59,6 +61,20 @@ class UIManager:
         self.menu_animation_direction = 1
         self.last_time = pygame.time.get_ticks()
 
+        # 上一次绘制的HUD和小地图内容，用于判断区域是否变化
+        self.hud_state = None
+        self.mini_map_state = None
+
+        # 按屏幕尺寸缓存的背景、覆盖层和静态文字 {(名称, 屏幕尺寸): 界面层}
+        self.screen_layers = {}
+
+        # 当前关卡的小地图静态层
+        self.mini_map_layer = None
+
+        # 性能分析叠加层，以及生成它时分析器已记录的帧数
+        self.profiler_panel = None
+        self.profiler_panel_frame = 0
+
     def update_animations(self):
         """更新动画效果"""
         current_time = pygame.time.get_ticks()
@@ -74,20 +90,24 @@ class UIManager:
         """绘制主菜单"""
         self.update_animations()
 
-        # 背景渐变
-        self.draw_gradient_background()
+        # 背景渐变、菜单选项和版本信息不会变化，预先合成到一个表面上
+        self.screen.blit(self.get_screen_layer("menu", self.build_menu_background), (0, 0))
 
         # 游戏标题 - 使用英文避免字体问题
         title_text = "Maze Adventure Game"
-        title_surface = self.fonts["xlarge"].render(title_text, True, GameConfig.COLORS["WHITE"])
+        title_surface = text_cache.render(self.fonts["xlarge"], title_text, GameConfig.COLORS["WHITE"])
         title_rect = title_surface.get_rect(center=(self.screen_width // 2, 150 + self.menu_animation_offset))
 
         # 标题阴影效果
-        shadow_surface = self.fonts["xlarge"].render(title_text, True, GameConfig.COLORS["DARK_GRAY"])
+        shadow_surface = text_cache.render(self.fonts["xlarge"], title_text, GameConfig.COLORS["DARK_GRAY"])
         shadow_rect = shadow_surface.get_rect(center=(self.screen_width // 2 + 3, 153 + self.menu_animation_offset))
         self.screen.blit(shadow_surface, shadow_rect)
         self.screen.blit(title_surface, title_rect)
 
+    def build_menu_background(self):
+        """生成主菜单的静态部分"""
+        background = self.build_gradient_background()
+
         # 菜单选项 - 使用英文
         menu_items = [
             ("Press SPACE to Start Game", GameConfig.COLORS["YELLOW"]),
@@ -102,27 +122,28 @@ class UIManager:
 
         y_start = 250
         for i, (text, color) in enumerate(menu_items):
-            surface = self.fonts["medium"].render(text, True, color)
-            rect = surface.get_rect(center=(self.screen_width // 2, y_start + i * 40))
+            text_surface = text_cache.render(self.fonts["medium"], text, color)
+            rect = text_surface.get_rect(center=(self.screen_width // 2, y_start + i * 40))
 
             # 为主要按钮添加边框
             if i == 0:  # 开始游戏按钮
                 border_rect = pygame.Rect(rect.x - 20, rect.y - 10, rect.width + 40, rect.height + 20)
-                pygame.draw.rect(self.screen, GameConfig.COLORS["YELLOW"], border_rect, 3)
-                pygame.draw.rect(self.screen, GameConfig.COLORS["BLACK"], border_rect)
+                pygame.draw.rect(background, GameConfig.COLORS["YELLOW"], border_rect, 3)
+                pygame.draw.rect(background, GameConfig.COLORS["BLACK"], border_rect)
 
-            self.screen.blit(surface, rect)
+            background.blit(text_surface, rect)
 
         # 版本信息
         version_text = "v1.0 - AI Made"
-        version_surface = self.fonts["small"].render(version_text, True, GameConfig.COLORS["GRAY"])
+        version_surface = text_cache.render(self.fonts["small"], version_text, GameConfig.COLORS["GRAY"])
         version_rect = version_surface.get_rect(bottomright=(self.screen_width - 10, self.screen_height - 10))
-        self.screen.blit(version_surface, version_rect)
+        background.blit(version_surface, version_rect)
+        return background
 
     # ... 其他方法保持不变，但将中文文本改为英文 ...
 
     def draw_game_hud(self, player, level_name, game_time, level_num):
-        """绘制游戏HUD"""
+        """绘制游戏HUD，内容有变化时返回HUD区域，否则返回None"""
         # HUD背景
         hud_rect = pygame.Rect(0, 0, self.screen_width, GameConfig.UI_PANEL_HEIGHT)
         pygame.draw.rect(self.screen, GameConfig.COLORS["BLACK"], hud_rect)
@@ -133,17 +154,17 @@ class UIManager:
 
         # 关卡信息
         level_text = f"Level {level_num}: {level_name}"
-        level_surface = self.fonts["medium"].render(level_text, True, GameConfig.COLORS["WHITE"])
+        level_surface = text_cache.render(self.fonts["medium"], level_text, GameConfig.COLORS["WHITE"])
         self.screen.blit(level_surface, (margin, y_pos))
 
         # 生命值
         lives_text = f"Lives: {player.lives}"
-        lives_surface = self.fonts["medium"].render(lives_text, True, GameConfig.COLORS["RED"])
+        lives_surface = text_cache.render(self.fonts["medium"], lives_text, GameConfig.COLORS["RED"])
         self.screen.blit(lives_surface, (margin, y_pos + 30))
 
         # 分数
         score_text = f"Score: {player.score}"
-        score_surface = self.fonts["medium"].render(score_text, True, GameConfig.COLORS["YELLOW"])
+        score_surface = text_cache.render(self.fonts["medium"], score_text, GameConfig.COLORS["YELLOW"])
         score_rect = score_surface.get_rect()
         self.screen.blit(score_surface, (self.screen_width // 2 - score_rect.width // 2, y_pos))
 
@@ -151,7 +172,7 @@ class UIManager:
         minutes = int(game_time // 60)
         seconds = int(game_time % 60)
         time_text = f"Time: {minutes:02d}:{seconds:02d}"
-        time_surface = self.fonts["medium"].render(time_text, True, GameConfig.COLORS["CYAN"])
+        time_surface = text_cache.render(self.fonts["medium"], time_text, GameConfig.COLORS["CYAN"])
         time_rect = time_surface.get_rect()
         self.screen.blit(time_surface, (self.screen_width - time_rect.width - margin, y_pos))
 
@@ -161,23 +182,33 @@ class UIManager:
 
         if player.speed_boost:
             speed_text = "Speed Boost!"
-            speed_surface = self.fonts["small"].render(speed_text, True, GameConfig.COLORS["YELLOW"])
+            speed_surface = text_cache.render(self.fonts["small"], speed_text, GameConfig.COLORS["YELLOW"])
             self.screen.blit(speed_surface, (status_x, status_y))
             status_x -= 80
 
         if player.invincible:
             invincible_text = "Invincible!"
-            invincible_surface = self.fonts["small"].render(invincible_text, True, GameConfig.COLORS["CYAN"])
+            invincible_surface = text_cache.render(self.fonts["small"], invincible_text, GameConfig.COLORS["CYAN"])
             self.screen.blit(invincible_surface, (status_x, status_y))
 
         # 控制提示
         controls_text = "ESC: Pause | R: Restart"
-        controls_surface = self.fonts["small"].render(controls_text, True, GameConfig.COLORS["LIGHT_GRAY"])
+        controls_surface = text_cache.render(self.fonts["small"], controls_text, GameConfig.COLORS["LIGHT_GRAY"])
         controls_rect = controls_surface.get_rect()
         self.screen.blit(controls_surface, (self.screen_width // 2 - controls_rect.width // 2, y_pos + 60))
 
-    def draw_gradient_background(self):
-        """绘制渐变背景"""
+        hud_state = (level_text, lives_text, score_text, time_text, player.speed_boost, player.invincible)
+        if hud_state == self.hud_state:
+            return None
+        self.hud_state = hud_state
+        return hud_rect
+
+    def build_gradient_background(self):
+        """生成渐变背景表面"""
+        surface = pygame.Surface((self.screen_width, self.screen_height))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+
         # 简单的垂直渐变效果
         for y in range(self.screen_height):
             ratio = y / self.screen_height
@@ -185,21 +216,58 @@ class UIManager:
             color_g = int(30 * (1 - ratio) + 10 * ratio)
             color_b = int(60 * (1 - ratio) + 20 * ratio)
             color = (color_r, color_g, color_b)
-            pygame.draw.line(self.screen, color, (0, y), (self.screen_width, y))
+            pygame.draw.line(surface, color, (0, y), (self.screen_width, y))
+        return surface
+
+    def get_screen_layer(self, name, build):
+        """获取按屏幕尺寸缓存的界面层，不存在时调用 build() 生成"""
+        key = (name, self.screen.get_size())
+        layer = self.screen_layers.get(key)
+        if layer is None:
+            layer = build()
+            self.screen_layers[key] = layer
+        return layer
+
+    def build_overlay(self, color):
+        """生成半透明的全屏覆盖层"""
+        overlay = pygame.Surface((self.screen_width, self.screen_height))
+        if pygame.display.get_surface() is not None:
+            overlay = overlay.convert()
+        overlay.set_alpha(128)
+        overlay.fill(color)
+        return overlay
+
+    def layout_text(self, lines):
+        """排版静态文字，lines 为 (字体, 文字, 颜色, 中心点) 列表，返回 (表面, 位置) 列表"""
+        layout = []
+        for font, text, color, center in lines:
+            surface = text_cache.render(self.fonts[font], text, color)
+            layout.append((surface, surface.get_rect(center=center)))
+        return layout
+
+    def draw_layout(self, layout):
+        """绘制排版好的文字"""
+        for surface, rect in layout:
+            self.screen.blit(surface, rect)
+
+    def layout_menu_items(self, menu_items, y_start):
+        """排版白色的菜单选项"""
+        return [("medium", text, GameConfig.COLORS["WHITE"], (self.screen_width // 2, y_start + i * 40))
+                for i, text in enumerate(menu_items)]
 
     def draw_pause_menu(self):
         """绘制暂停菜单"""
         # 半透明覆盖层
-        overlay = pygame.Surface((self.screen_width, self.screen_height))
-        overlay.set_alpha(128)
-        overlay.fill(GameConfig.COLORS["BLACK"])
+        overlay = self.get_screen_layer("pause_overlay", lambda: self.build_overlay(GameConfig.COLORS["BLACK"]))
         self.screen.blit(overlay, (0, 0))
 
-        # 暂停文字
-        pause_text = "GAME PAUSED"
-        pause_surface = self.fonts["xlarge"].render(pause_text, True, GameConfig.COLORS["WHITE"])
-        pause_rect = pause_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 100))
-        self.screen.blit(pause_surface, pause_rect)
+        # 暂停文字和菜单选项
+        self.draw_layout(self.get_screen_layer("pause_text", self.build_pause_text))
+
+    def build_pause_text(self):
+        """排版暂停菜单的文字"""
+        lines = [("xlarge", "GAME PAUSED", GameConfig.COLORS["WHITE"],
+                  (self.screen_width // 2, self.screen_height // 2 - 100))]
 
         # 菜单选项
         menu_items = [
@@ -207,64 +275,56 @@ class UIManager:
             "R - Restart Level",
             "Q - Return to Menu"
         ]
-
-        y_start = self.screen_height // 2 - 20
-        for i, text in enumerate(menu_items):
-            surface = self.fonts["medium"].render(text, True, GameConfig.COLORS["WHITE"])
-            rect = surface.get_rect(center=(self.screen_width // 2, y_start + i * 40))
-            self.screen.blit(surface, rect)
+        lines.extend(self.layout_menu_items(menu_items, self.screen_height // 2 - 20))
+        return self.layout_text(lines)
 
     def draw_game_over(self):
         """绘制游戏结束界面"""
         # 半透明覆盖层
-        overlay = pygame.Surface((self.screen_width, self.screen_height))
-        overlay.set_alpha(128)
-        overlay.fill(GameConfig.COLORS["RED"])
+        overlay = self.get_screen_layer("game_over_overlay", lambda: self.build_overlay(GameConfig.COLORS["RED"]))
         self.screen.blit(overlay, (0, 0))
 
-        # 游戏结束文字
-        game_over_text = "GAME OVER"
-        game_over_surface = self.fonts["xlarge"].render(game_over_text, True, GameConfig.COLORS["WHITE"])
-        game_over_rect = game_over_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 100))
-        self.screen.blit(game_over_surface, game_over_rect)
+        # 游戏结束文字、失败原因和菜单选项
+        self.draw_layout(self.get_screen_layer("game_over_text", self.build_game_over_text))
 
-        # 失败原因
-        reason_text = "You ran out of lives!"
-        reason_surface = self.fonts["medium"].render(reason_text, True, GameConfig.COLORS["YELLOW"])
-        reason_rect = reason_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 50))
-        self.screen.blit(reason_surface, reason_rect)
+    def build_game_over_text(self):
+        """排版游戏结束界面的文字"""
+        lines = [
+            ("xlarge", "GAME OVER", GameConfig.COLORS["WHITE"],
+             (self.screen_width // 2, self.screen_height // 2 - 100)),
+            ("medium", "You ran out of lives!", GameConfig.COLORS["YELLOW"],
+             (self.screen_width // 2, self.screen_height // 2 - 50))
+        ]
 
         # 菜单选项
         menu_items = [
             "R - Restart Level",
             "Q - Return to Menu"
         ]
-
-        y_start = self.screen_height // 2 + 20
-        for i, text in enumerate(menu_items):
-            surface = self.fonts["medium"].render(text, True, GameConfig.COLORS["WHITE"])
-            rect = surface.get_rect(center=(self.screen_width // 2, y_start + i * 40))
-            self.screen.blit(surface, rect)
+        lines.extend(self.layout_menu_items(menu_items, self.screen_height // 2 + 20))
+        return self.layout_text(lines)
 
     def draw_victory(self, has_next_level=False):
         """绘制胜利界面"""
         # 半透明覆盖层
-        overlay = pygame.Surface((self.screen_width, self.screen_height))
-        overlay.set_alpha(128)
-        overlay.fill(GameConfig.COLORS["GREEN"])
+        overlay = self.get_screen_layer("victory_overlay", lambda: self.build_overlay(GameConfig.COLORS["GREEN"]))
         self.screen.blit(overlay, (0, 0))
 
-        # 胜利文字
-        victory_text = "LEVEL COMPLETE!"
-        victory_surface = self.fonts["xlarge"].render(victory_text, True, GameConfig.COLORS["WHITE"])
-        victory_rect = victory_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 100))
-        self.screen.blit(victory_surface, victory_rect)
+        # 胜利文字、祝贺文字和菜单选项
+        self.draw_layout(self.get_screen_layer(("victory_text", has_next_level),
+                                               lambda: self.build_victory_text(has_next_level)))
+
+        # 绘制星星动画效果
+        self.draw_victory_stars()
 
-        # 祝贺文字
-        congrats_text = "Congratulations!"
-        congrats_surface = self.fonts["medium"].render(congrats_text, True, GameConfig.COLORS["YELLOW"])
-        congrats_rect = congrats_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 50))
-        self.screen.blit(congrats_surface, congrats_rect)
+    def build_victory_text(self, has_next_level):
+        """排版胜利界面的文字"""
+        lines = [
+            ("xlarge", "LEVEL COMPLETE!", GameConfig.COLORS["WHITE"],
+             (self.screen_width // 2, self.screen_height // 2 - 100)),
+            ("medium", "Congratulations!", GameConfig.COLORS["YELLOW"],
+             (self.screen_width // 2, self.screen_height // 2 - 50))
+        ]
 
         # 菜单选项
         menu_items = []
@@ -274,15 +334,8 @@ class UIManager:
             "R - Restart Level",
             "Q - Return to Menu"
         ])
-
-        y_start = self.screen_height // 2 + 20
-        for i, text in enumerate(menu_items):
-            surface = self.fonts["medium"].render(text, True, GameConfig.COLORS["WHITE"])
-            rect = surface.get_rect(center=(self.screen_width // 2, y_start + i * 40))
-            self.screen.blit(surface, rect)
-
-        # 绘制星星动画效果
-        self.draw_victory_stars()
+        lines.extend(self.layout_menu_items(menu_items, self.screen_height // 2 + 20))
+        return self.layout_text(lines)
 
     def draw_victory_stars(self):
         """绘制胜利星星动画"""
@@ -310,57 +363,116 @@ class UIManager:
             if len(star_points) >= 6:  # 确保有足够的点
                 pygame.draw.polygon(self.screen, GameConfig.COLORS["YELLOW"], star_points)
 
+    def reset_mini_map(self):
+        """丢弃小地图静态层和已探索的区域，重新开始关卡时调用"""
+        self.mini_map_layer = None
+
     def draw_mini_map(self, level_data, player, enemies, offset_x, offset_y):
-        """绘制小地图"""
+        """绘制小地图，标记有变化时返回小地图区域，否则返回None"""
         if not level_data:
-            return
+            return None
 
         # 小地图设置
         mini_map_size = 150
         mini_map_x = self.screen_width - mini_map_size - 10
         mini_map_y = GameConfig.UI_PANEL_HEIGHT + 10
 
-        # 计算缩放比例
-        scale_x = mini_map_size / level_data["width"]
-        scale_y = mini_map_size / level_data["height"]
-        scale = min(scale_x, scale_y)
-
-        # 小地图背景
+        # 背景、墙壁和终点来自每关只绘制一次的静态层，关卡或墙壁变化时重建
         mini_map_rect = pygame.Rect(mini_map_x, mini_map_y, mini_map_size, mini_map_size)
-        pygame.draw.rect(self.screen, GameConfig.COLORS["BLACK"], mini_map_rect)
-        pygame.draw.rect(self.screen, GameConfig.COLORS["WHITE"], mini_map_rect, 2)
-
-        # 绘制墙壁
-        for wall in level_data["walls"]:
-            wall_x = mini_map_x + wall[0] * scale
-            wall_y = mini_map_y + wall[1] * scale
-            wall_w = wall[2] * scale
-            wall_h = wall[3] * scale
-            wall_rect = pygame.Rect(wall_x, wall_y, wall_w, wall_h)
-            pygame.draw.rect(self.screen, GameConfig.COLORS["GRAY"], wall_rect)
-
-        # 绘制终点
-        goal = level_data["goal"]
-        goal_x = mini_map_x + goal[0] * scale
-        goal_y = mini_map_y + goal[1] * scale
-        pygame.draw.circle(self.screen, GameConfig.COLORS["GREEN"],
-                           (int(goal_x), int(goal_y)), max(2, int(scale // 2)))
-
-        # 绘制敌人
+        fog_of_war = GameConfig.MINIMAP_FOG_OF_WAR
+        layer = self.mini_map_layer
+        if layer is None or not layer.matches(level_data, mini_map_rect, fog_of_war):
+            # 墙壁变化时保留已探索的区域
+            explored = None
+            if layer is not None and layer.level_data is level_data and layer.fog_of_war == fog_of_war:
+                explored = layer.explored
+            layer = MiniMapLayer(level_data, mini_map_rect, fog_of_war, explored)
+            self.mini_map_layer = layer
+        layer.reveal(int(player.x), int(player.y), GameConfig.MINIMAP_REVEAL_RADIUS)
+        layer.blit(self.screen)
+        scale = layer.scale
+
+        # 绘制敌人，迷雾中的敌人不显示
+        markers = [layer.revealed]
         for enemy in enemies:
+            if not layer.is_explored(int(enemy.x), int(enemy.y)):
+                continue
             enemy_x = mini_map_x + enemy.x * scale
             enemy_y = mini_map_y + enemy.y * scale
             color = GameConfig.COLORS["RED"] if enemy.mode == "CHASE" else GameConfig.COLORS["PURPLE"]
             pygame.draw.circle(self.screen, color,
                                (int(enemy_x), int(enemy_y)), max(1, int(scale // 3)))
+            markers.append((int(enemy_x), int(enemy_y), enemy.mode))
 
         # 绘制玩家
         player_x = mini_map_x + player.x * scale
         player_y = mini_map_y + player.y * scale
+        radius = max(2, int(scale // 2))
         pygame.draw.circle(self.screen, GameConfig.COLORS["BLUE"],
-                           (int(player_x), int(player_y)), max(2, int(scale // 2)))
+                           (int(player_x), int(player_y)), radius)
+        markers.append((int(player_x), int(player_y)))
 
         # 小地图标题
         title_text = "Mini Map"
-        title_surface = self.fonts["small"].render(title_text, True, GameConfig.COLORS["WHITE"])
-        self.screen.blit(title_surface, (mini_map_x, mini_map_y - 20))
\ No newline at end of file
+        title_surface = text_cache.render(self.fonts["small"], title_text, GameConfig.COLORS["WHITE"])
+        title_rect = self.screen.blit(title_surface, (mini_map_x, mini_map_y - 20))
+
+        mini_map_state = (id(level_data), tuple(markers))
+        if mini_map_state == self.mini_map_state:
+            return None
+        self.mini_map_state = mini_map_state
+        # 贴着边缘的标记会画出小地图范围
+        return mini_map_rect.inflate(radius * 2 + 2, radius * 2 + 2).union(title_rect)
+
+    def draw_profiler_overlay(self, profiler):
+        """绘制性能分析叠加层，统计数据每隔几帧才重新生成一次，返回叠加层区域"""
+        frames_since = profiler.frames - self.profiler_panel_frame
+        if self.profiler_panel is None or not 0 <= frames_since < GameConfig.PROFILER_OVERLAY_REFRESH:
+            self.profiler_panel = self.build_profiler_panel(profiler)
+            self.profiler_panel_frame = profiler.frames
+
+        panel_rect = self.profiler_panel.get_rect(
+            bottomleft=(GameConfig.UI_MARGIN, self.screen_height - GameConfig.UI_MARGIN))
+        return self.screen.blit(self.profiler_panel, panel_rect)
+
+    def build_profiler_panel(self, profiler):
+        """生成性能分析叠加层：整帧耗时曲线和各项耗时的 p50/p99（毫秒）"""
+        # 数字每次都不同，直接渲染，不占用文字缓存
+        font = self.fonts["small"]
+        line_height = font.get_linesize()
+        margin = GameConfig.UI_MARGIN
+        width = 300
+        graph_height = 80
+        height = margin * 3 + graph_height + line_height * (len(profiler.columns) + 1)
+
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+
+        # 帧耗时曲线，绿线为一帧的时间预算
+        graph_rect = pygame.Rect(margin, margin, width - margin * 2, graph_height)
+        frame_times = profiler.get_column("frame")
+        budget = 1000 / GameConfig.FPS
+        scale = graph_rect.height / max(budget * 2, max(frame_times, default=0))
+        pygame.draw.rect(panel, GameConfig.COLORS["DARK_GRAY"], graph_rect, 1)
+        budget_y = graph_rect.bottom - budget * scale
+        pygame.draw.line(panel, GameConfig.COLORS["GREEN"], (graph_rect.left, budget_y), (graph_rect.right, budget_y))
+        if len(frame_times) >= 2:
+            step = graph_rect.width / max(1, profiler.capacity - 1)
+            points = [(graph_rect.left + i * step, graph_rect.bottom - value * scale)
+                      for i, value in enumerate(frame_times)]
+            pygame.draw.lines(panel, GameConfig.COLORS["YELLOW"], False, points)
+
+        # 各项耗时的百分位数
+        columns = (margin, width - margin - 90, width - margin)
+        y = graph_rect.bottom + margin
+        rows = [("ms", "p50", "p99", GameConfig.COLORS["LIGHT_GRAY"])]
+        for name, (p50, p99) in profiler.get_percentiles().items():
+            color = GameConfig.COLORS["RED"] if name == "frame" and p99 > budget else GameConfig.COLORS["WHITE"]
+            rows.append((name, f"{p50:.2f}", f"{p99:.2f}", color))
+        for name, p50, p99, color in rows:
+            panel.blit(font.render(name, True, color), (columns[0], y))
+            for text, right in ((p50, columns[1]), (p99, columns[2])):
+                surface = font.render(text, True, color)
+                panel.blit(surface, surface.get_rect(topright=(right, y)))
+            y += line_height
+        return panel
\ No newline at end of file